@@ -0,0 +1,136 @@
+"""
+Benchmarks for authenticating a request, from parsing the header to loading the token and its user.
+
+Each table size is loaded into an in-memory SQLite database, then every step is timed call by call over a rotating
+sample of real token values. The report shows the queries made per call and the latency percentiles, so the cost of
+a change can be compared between releases and across table sizes.
+
+    python benchmarks/authentication.py --sizes 1000 100000 1000000 --calls 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+
+from django_pat.http import parse_header  # noqa: E402
+from django_pat.middleware import PatAuthenticationMiddleware  # noqa: E402
+from django_pat.models import PersonalAccessToken  # noqa: E402
+from django_pat.models import TokenEntry  # noqa: E402
+from django_pat.models import _hash_value  # noqa: E402
+from django_pat.rest_framework.auth import PatAuthentication  # noqa: E402
+
+User = get_user_model()
+
+TOKENS_PER_USER = 100
+
+
+def populate(size: int, sample_size: int) -> list:
+    """
+    Replace the tokens in the database with `size` new ones, returning the values of a random sample of them.
+    """
+    PersonalAccessToken.objects.all().delete()
+    User.objects.all().delete()
+
+    users = User.objects.bulk_create(User(username=f"user-{i}") for i in range(-(-size // TOKENS_PER_USER)))
+    entries = (TokenEntry(users[i // TOKENS_PER_USER], f"token-{i}") for i in range(size))
+    sampled = set(random.sample(range(size), min(sample_size, size)))
+
+    return [value for i, (_, value) in enumerate(PersonalAccessToken.objects.bulk_create_tokens(entries)) if i in sampled]
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def measure(name: str, func, inputs: list, calls: int) -> None:
+    timings = []
+
+    with CaptureQueriesContext(connection) as queries:
+        for i in range(calls):
+            argument = inputs[i % len(inputs)]
+            start = time.perf_counter_ns()
+            func(argument)
+            timings.append(time.perf_counter_ns() - start)
+
+    timings.sort()
+    print(
+        f"{name:<40} {len(queries) / calls:>9.2f}"
+        f" {statistics.mean(timings) / 1000:>9.1f}"
+        f" {percentile(timings, 0.5) / 1000:>9.1f}"
+        f" {percentile(timings, 0.9) / 1000:>9.1f}"
+        f" {percentile(timings, 0.99) / 1000:>9.1f}"
+    )
+
+
+def run(size: int, calls: int, sample_size: int) -> None:
+    values = populate(size, sample_size)
+    unknown = [f"pat_{i:012d}_unknown" for i in range(sample_size)]
+
+    factory = RequestFactory()
+    requests = [factory.get("/", HTTP_AUTHORIZATION=f"Access-Token {value}") for value in values]
+
+    def request_user(request):
+        # The middleware resolves the user lazily, so the view has to use it for the token to be authenticated.
+        return request.user.pk
+
+    middleware = PatAuthenticationMiddleware(request_user)
+    authentication = PatAuthentication()
+
+    def fresh(request):
+        # Each call gets a fresh request, as each request would in production.
+        request.__dict__.pop("user", None)
+        request.__dict__.pop("_cached_user", None)
+        return request
+
+    print(f"\n{size} tokens, {calls} calls")
+    print(f"{'':<40} {'queries':>9} {'mean µs':>9} {'p50 µs':>9} {'p90 µs':>9} {'p99 µs':>9}")
+
+    measure("parse_header", parse_header, requests, calls)
+    measure("_hash_value", _hash_value, values, calls)
+    measure("first_valid_token, known", PersonalAccessToken.objects.first_valid_token, values, calls)
+    measure("first_valid_token, unknown", PersonalAccessToken.objects.first_valid_token, unknown, calls)
+    measure("get_for_authentication, known", PersonalAccessToken.objects.get_for_authentication, values, calls)
+    measure("get_for_authentication, unknown", PersonalAccessToken.objects.get_for_authentication, unknown, calls)
+    measure("PatAuthenticationMiddleware", lambda request: middleware(fresh(request)), requests, calls)
+    measure("PatAuthentication.authenticate", lambda request: authentication.authenticate(Request(request)), requests, calls)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Token table sizes to load.")
+    parser.add_argument("--calls", type=int, default=2000, help="The number of calls timed for each step.")
+    parser.add_argument("--sample", type=int, default=1000, help="The number of distinct tokens the calls rotate through.")
+    parser.add_argument("--cache", action="store_true", help="Run with PAT_CACHE_ENABLED.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for choosing the sampled tokens.")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    call_command("migrate", verbosity=0)
+
+    with override_settings(PAT_CACHE_ENABLED=args.cache):
+        for size in args.sizes:
+            run(size, args.calls, args.sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Microbenchmarks for parsing the token header.
+
+Compares parsing that reads the header settings on every request, as parse_header did before HeaderParser, with the
+compiled parser. Both are timed alone and through the middleware and REST Framework authentication, using requests
+that are handled without reaching the database.
+
+    python benchmarks/header_parsing.py
+"""
+
+import os
+import sys
+import timeit
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from django_pat.http import ParseException  # noqa: E402
+from django_pat.http import get_header  # noqa: E402
+from django_pat.http import get_keyword  # noqa: E402
+from django_pat.http import get_parser  # noqa: E402
+from django_pat.http import uses_shared_header  # noqa: E402
+from django_pat.middleware import PatAuthenticationMiddleware  # noqa: E402
+from django_pat.rest_framework.auth import PatAuthentication  # noqa: E402
+
+
+def settings_parse_header(request):
+    header = get_header()
+
+    if header not in request.headers:
+        return
+
+    header_val = str(request.headers.get(get_header()))
+    if not header_val:
+        raise ParseException("Invalid header")
+
+    starts_with_prefix = header_val.startswith(get_keyword() + " ")
+    if not starts_with_prefix and uses_shared_header():
+        return
+
+    if not starts_with_prefix:
+        raise ParseException("Invalid authentication type")
+
+    _, token_val = header_val.split(get_keyword() + " ")
+
+    return token_val
+
+
+class SettingsParser:
+    parse = staticmethod(settings_parse_header)
+
+    @property
+    def keyword(self):
+        return get_keyword()
+
+
+def time_call(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def compare(name: str, func, number: int) -> None:
+    with mock.patch("django_pat.middleware.get_parser", SettingsParser), mock.patch(
+        "django_pat.rest_framework.auth.get_parser", SettingsParser
+    ):
+        before = time_call(func, number)
+
+    after = time_call(func, number)
+
+    print(f"{name:<45} {before:>10.0f} ns {after:>10.0f} ns {before / after:>8.2f}x")
+
+
+def main(number: int = 20000) -> None:
+    factory = RequestFactory()
+    middleware = PatAuthenticationMiddleware(lambda request: None)
+    authentication = PatAuthentication()
+
+    def fresh(**headers):
+        request = factory.get("/", **headers)
+
+        # Each request gets a fresh headers mapping, as it would in production.
+        def run():
+            request.__dict__.pop("headers", None)
+            return request
+
+        return run
+
+    token_request = fresh(HTTP_AUTHORIZATION="Access-Token pat_abcdefghijkl_secret")
+    anonymous_request = fresh()
+    other_request = fresh(HTTP_AUTHORIZATION="Bearer 1234")
+
+    print(f"{'':<45} {'settings':>13} {'compiled':>13} {'speedup':>9}")
+
+    def parse_settings():
+        settings_parse_header(token_request())
+
+    def parse_compiled():
+        get_parser().parse(token_request())
+
+    before = time_call(parse_settings, number)
+    after = time_call(parse_compiled, number)
+    print(f"{'parse_header':<45} {before:>10.0f} ns {after:>10.0f} ns {before / after:>8.2f}x")
+
+    compare("middleware, token header", lambda: middleware.handle(token_request()), number)
+    compare("middleware, no header", lambda: middleware.handle(anonymous_request()), number)
+    compare("rest framework, no header", lambda: authentication.authenticate(anonymous_request()), number)
+
+    with override_settings(PAT_USES_SHARED_HEADER=True):
+        compare("middleware, shared header", lambda: middleware.handle(other_request()), number)
+        compare("rest framework, shared header", lambda: authentication.authenticate(other_request()), number)
+
+
+if __name__ == "__main__":
+    main()
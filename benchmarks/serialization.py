@@ -0,0 +1,116 @@
+"""
+Benchmarks for listing tokens through the REST framework viewset.
+
+Compares serializing token instances with CreatePersonalAccessTokenSerializer, as the list action did before, with
+serializing `.values()` rows with PersonalAccessTokenReadSerializer. Each list size is loaded for a single user into an
+in-memory SQLite database, and both are timed with and without loading the tokens from the database.
+
+    python benchmarks/serialization.py --sizes 100 1000 10000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from django_pat.models import PersonalAccessToken  # noqa: E402
+from django_pat.models import TokenEntry  # noqa: E402
+from django_pat.rest_framework.views import (  # noqa: E402
+    CreatePersonalAccessTokenSerializer,
+)
+from django_pat.rest_framework.views import (  # noqa: E402
+    PersonalAccessTokenReadSerializer,
+)
+
+User = get_user_model()
+
+
+def populate(size: int):
+    PersonalAccessToken.objects.all().delete()
+    User.objects.all().delete()
+
+    user = User.objects.create(username="user")
+    # Tokens are created as the returned values are consumed.
+    for _ in PersonalAccessToken.objects.bulk_create_tokens(TokenEntry(user, f"token-{i}", f"Token {i}") for i in range(size)):
+        pass
+
+    return user
+
+
+def instances(user):
+    # The queryset the list action used with CreatePersonalAccessTokenSerializer. It loads the same columns as the rows,
+    # since deferring a field the serializer reads would cost a query per token instead of measuring serialization.
+    return (
+        PersonalAccessToken.objects.filter(user=user)
+        .only(*PersonalAccessTokenReadSerializer.source_fields)
+        .with_total_requests()
+    )
+
+
+def rows(user):
+    return (
+        PersonalAccessToken.objects.filter(user=user)
+        .values(*PersonalAccessTokenReadSerializer.source_fields)
+        .with_total_requests()
+    )
+
+
+def time_call(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e3
+
+
+def compare(name: str, before, after, number: int) -> None:
+    before_ms = time_call(before, number)
+    after_ms = time_call(after, number)
+
+    print(f"{name:<30} {before_ms:>10.2f} ms {after_ms:>10.2f} ms {before_ms / after_ms:>8.2f}x")
+
+
+def run(size: int, number: int) -> None:
+    user = populate(size)
+
+    print(f"\n{size} tokens")
+    print(f"{'':<30} {'instances':>13} {'rows':>13} {'speedup':>9}")
+
+    loaded_instances = list(instances(user))
+    loaded_rows = list(rows(user))
+    compare(
+        "serialize",
+        lambda: CreatePersonalAccessTokenSerializer(loaded_instances, many=True).data,
+        lambda: PersonalAccessTokenReadSerializer(loaded_rows, many=True).data,
+        number,
+    )
+    compare(
+        "query and serialize",
+        lambda: CreatePersonalAccessTokenSerializer(instances(user), many=True).data,
+        lambda: PersonalAccessTokenReadSerializer(rows(user), many=True).data,
+        number,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Token list sizes to load.")
+    parser.add_argument("--number", type=int, default=5, help="The number of calls timed in each repeat.")
+    args = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+
+    for size in args.sizes:
+        run(size, args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -33,7 +33,7 @@ def tests(session, django):
     session.run("pytest", "--cov", "--cov-report=xml")
 
 
-lint_dirs = ["src", "tests", "example_project"]
+lint_dirs = ["src", "tests", "example_project", "benchmarks"]
 
 
 @nox.session(python=["3.8"])
@@ -48,3 +48,10 @@ def formatting(session):
     session.run("flake8", *lint_dirs)
     session.run("isort", "--check-only", "--diff", "--force-single-line-imports", "--profile", "black", *lint_dirs)
     session.run("black", "--check", "--diff", *lint_dirs)
+
+
+@nox.session(python=["3.12"])
+def benchmarks(session):
+    session.run("poetry", "install", external=True)
+    # Arguments after -- are passed on, e.g. nox -s benchmarks -- --sizes 1000 1000000
+    session.run("python", "benchmarks/authentication.py", *session.posargs)
@@ -2,16 +2,28 @@ from django import forms
 from django.contrib import admin
 from django.contrib import messages
 from django.contrib.auth.base_user import AbstractBaseUser
+from django.utils.translation import ngettext
 
+from django_pat import scopes
 from django_pat.models import PersonalAccessToken
+from django_pat.models import PersonalAccessTokenUsage
 
 
 class PersonalAccessTokenForm(forms.ModelForm):
     current_user: AbstractBaseUser
 
+    # The form takes scope names, which are turned into the stored mask when the token is created.
+    scope_names = forms.MultipleChoiceField(
+        label="Scopes",
+        choices=scopes.get_choices,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+        help_text="Leave empty for a token with full access.",
+    )
+
     class Meta:
         model = PersonalAccessToken
-        fields = ["name", "description"]
+        fields = ["name", "description", "expires_at", "throttle_rate"]
 
     def save(self, commit=True):
         token, value = PersonalAccessToken.objects.create_token(
@@ -19,6 +31,9 @@ class PersonalAccessTokenForm(forms.ModelForm):
             self.cleaned_data["name"],
             self.cleaned_data["description"],
             commit=commit,
+            expires_at=self.cleaned_data.get("expires_at"),
+            throttle_rate=self.cleaned_data.get("throttle_rate", ""),
+            scopes=self.cleaned_data.get("scope_names"),
         )
         token.plain_text_value = value
 
@@ -28,21 +43,63 @@ class PersonalAccessTokenForm(forms.ModelForm):
         pass
 
 
+class PersonalAccessTokenUsageInline(admin.TabularInline):
+    model = PersonalAccessTokenUsage
+    fields = ["date", "count"]
+    readonly_fields = ["date", "count"]
+    ordering = ["-date"]
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None) -> bool:
+        return False
+
+
 class PersonalAccessTokenAdmin(admin.ModelAdmin):
     form = PersonalAccessTokenForm
-    list_display = ["user", "name", "last_used_at", "revoked_at"]
-    fields = ["user", "name", "description", "last_used_at", "revoked_at"]
+    inlines = [PersonalAccessTokenUsageInline]
+    list_display = ["user", "name", "last_used_at", "total_requests", "expires_at", "revoked_at"]
+    fields = ["user", "name", "description", "last_used_at", "expires_at", "throttle_rate", "scope_names", "revoked_at"]
     readonly_fields = ["user", "last_used_at", "revoked_at"]
+    actions = ["revoke_selected"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_total_requests()
+
+    @admin.display(description="Total requests", ordering="total_requests")
+    def total_requests(self, obj: PersonalAccessToken) -> int:
+        return getattr(obj, "total_requests", None) or 0
+
+    @admin.display(description="Scopes")
+    def scope_names(self, obj: PersonalAccessToken) -> str:
+        names = obj.scope_names
+        return ", ".join(names) if names is not None else "Full access"
 
     def delete_model(self, request, obj: PersonalAccessToken) -> None:
         obj.revoke()
 
+    def delete_queryset(self, request, queryset) -> None:
+        queryset.revoke()
+
+    @admin.action(description="Revoke selected personal access tokens")
+    def revoke_selected(self, request, queryset) -> None:
+        count = queryset.revoke()
+        self.message_user(
+            request,
+            ngettext("Revoked %d personal access token.", "Revoked %d personal access tokens.", count) % count,
+            messages.SUCCESS,
+        )
+
     def has_change_permission(self, request, obj=None) -> bool:
         return False
 
     def has_delete_permission(self, request, obj=None) -> bool:
         return obj and not obj.revoked_at
 
+    def get_inlines(self, request, obj):
+        # Usage only exists for saved tokens, so the form to create one has no inline.
+        return self.inlines if obj is not None else []
+
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, **kwargs)
         form.current_user = request.user
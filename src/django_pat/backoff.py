@@ -0,0 +1,90 @@
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from django_pat import cache as token_cache
+
+
+def backoff_enabled() -> bool:
+    return getattr(settings, "PAT_FAILED_AUTH_BACKOFF_ENABLED", False)
+
+
+def get_failure_limit() -> int:
+    return getattr(settings, "PAT_FAILED_AUTH_LIMIT", 20)
+
+
+def get_window() -> int:
+    return getattr(settings, "PAT_FAILED_AUTH_WINDOW", 300)
+
+
+def get_key_function():
+    return import_string(getattr(settings, "PAT_FAILED_AUTH_KEY_FUNCTION", "django_pat.backoff.client_ip"))
+
+
+def client_ip(request) -> Optional[str]:
+    """
+    Identify clients by the address of the connection. Behind a proxy, configure a key function that reads the
+    address the proxy forwards instead.
+    """
+    return request.META.get("REMOTE_ADDR")
+
+
+def _failures_key(request) -> Optional[str]:
+    client = get_key_function()(request)
+
+    if client is None:
+        return None
+
+    return f"django_pat:failures:{client}"
+
+
+def is_blocked(request) -> bool:
+    """
+    Return whether the client failed to authenticate too often within the window, so its token should not be checked.
+    """
+    key = _failures_key(request)
+
+    return key is not None and token_cache.get_cache().get(key, 0) >= get_failure_limit()
+
+
+async def ais_blocked(request) -> bool:
+    key = _failures_key(request)
+
+    return key is not None and await token_cache.get_cache().aget(key, 0) >= get_failure_limit()
+
+
+def record_failure(request) -> None:
+    key = _failures_key(request)
+    if key is None:
+        return
+
+    # The window starts with the first failure, and the client is blocked until it ends once over the limit.
+    cache = token_cache.get_cache()
+    if not cache.add(key, 1, get_window()):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The window ended between the two calls.
+            cache.add(key, 1, get_window())
+
+
+async def arecord_failure(request) -> None:
+    key = _failures_key(request)
+    if key is None:
+        return
+
+    cache = token_cache.get_cache()
+    if not await cache.aadd(key, 1, get_window()):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aadd(key, 1, get_window())
+
+
+def blocked_response() -> HttpResponse:
+    response = HttpResponse("Too many failed authentication attempts.", status=429, content_type="text/plain")
+    response["Retry-After"] = str(get_window())
+
+    return response
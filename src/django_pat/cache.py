@@ -0,0 +1,465 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+
+class CachedToken(NamedTuple):
+    token_id: int
+    user_id: int
+    revoked: bool
+    user_is_active: bool
+    expires_at: Optional[datetime] = None
+    throttle_rate: str = ""
+    scopes: Optional[int] = None
+
+    def is_expired(self) -> bool:
+        return self.expires_at is not None and self.expires_at <= timezone.now()
+
+
+def cache_enabled() -> bool:
+    return getattr(settings, "PAT_CACHE_ENABLED", False)
+
+
+def get_cache_alias() -> str:
+    return getattr(settings, "PAT_CACHE_ALIAS", "default")
+
+
+def get_cache_timeout() -> Optional[int]:
+    return getattr(settings, "PAT_CACHE_TIMEOUT", 300)
+
+
+def get_cache():
+    return caches[get_cache_alias()]
+
+
+def cache_users_enabled() -> bool:
+    return getattr(settings, "PAT_CACHE_USERS", False)
+
+
+def local_cache_enabled() -> bool:
+    return cache_enabled() and getattr(settings, "PAT_LOCAL_CACHE_ENABLED", False)
+
+
+def get_local_cache_timeout() -> float:
+    return getattr(settings, "PAT_LOCAL_CACHE_TIMEOUT", 60)
+
+
+def get_local_cache_max_size() -> int:
+    return getattr(settings, "PAT_LOCAL_CACHE_MAX_SIZE", 10000)
+
+
+def get_revocation_poll_interval() -> float:
+    return getattr(settings, "PAT_REVOCATION_POLL_INTERVAL", 1)
+
+
+def _token_key(hashed_value: str) -> str:
+    return f"django_pat:token:{hashed_value}"
+
+
+def _user_key(user_id) -> str:
+    return f"django_pat:user:{user_id}"
+
+
+def _touch_key(token_id) -> str:
+    return f"django_pat:touch:{token_id}"
+
+
+def _generation_key(name: str) -> str:
+    return f"django_pat:generation:{name}"
+
+
+def get_generation(name: str) -> int:
+    """
+    Return the current value of a counter shared through the cache, used to tell processes their local state is stale.
+    """
+    return get_cache().get(_generation_key(name), 0)
+
+
+async def aget_generation(name: str) -> int:
+    return await get_cache().aget(_generation_key(name), 0)
+
+
+def bump_generation(name: str) -> int:
+    cache = get_cache()
+    key = _generation_key(name)
+
+    cache.add(key, 0, None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The counter was evicted between the add and the increment.
+        cache.add(key, 1, None)
+        return 1
+
+
+REVOCATION = "revocation"
+
+# Entries of the revocation log are kept for this many seconds, and a process further behind than the replay limit
+# clears its local cache instead of replaying them.
+REVOCATION_LOG_TIMEOUT = 3600
+REVOCATION_REPLAY_LIMIT = 100
+
+
+def _revocation_key(generation: int) -> str:
+    return f"django_pat:revocation:{generation}"
+
+
+def publish_revocation(hashed_values: Iterable[str] = (), user_ids: Iterable[Any] = ()) -> None:
+    """
+    Tell every process to drop the given tokens and users from its local cache.
+    """
+    hashed_values = list(hashed_values)
+    user_ids = list(user_ids)
+
+    generation = bump_generation(REVOCATION)
+    get_cache().set(_revocation_key(generation), (hashed_values, user_ids), REVOCATION_LOG_TIMEOUT)
+
+    local_cache.evict(hashed_values, user_ids)
+
+
+class LocalTokenCache:
+    """
+    A small in-process cache of token lookups in front of the shared cache.
+
+    Every invalidation is published to a revocation log in the shared cache, under an increasing generation. Each
+    process replays the entries it has not seen at most every PAT_REVOCATION_POLL_INTERVAL seconds, evicting only the
+    tokens and users they name, so a revoked token stops working in every process within that delay.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[CachedToken, Optional[bytes], float]]" = OrderedDict()
+        self._generation: Optional[int] = None
+        self._polled_at = 0.0
+
+    def get(self, hashed_value: str) -> Optional[Tuple[CachedToken, Any]]:
+        entry = self._entries.get(hashed_value)
+
+        if entry is None:
+            return None
+
+        record, user, expires_at = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(hashed_value, None)
+            return None
+
+        # Each request gets its own copy of the user, as it would from the shared cache.
+        return record, pickle.loads(user) if user is not None else None
+
+    def set(self, hashed_value: str, record: CachedToken, user) -> None:
+        entry = (record, pickle.dumps(user) if user is not None else None, time.monotonic() + get_local_cache_timeout())
+
+        with self._lock:
+            self._entries[hashed_value] = entry
+            self._entries.move_to_end(hashed_value)
+
+            while len(self._entries) > get_local_cache_max_size():
+                self._entries.popitem(last=False)
+
+    def evict(self, hashed_values: Iterable[str], user_ids: Iterable[Any]) -> None:
+        user_ids = set(user_ids)
+
+        with self._lock:
+            for hashed_value in hashed_values:
+                self._entries.pop(hashed_value, None)
+
+            if user_ids:
+                for hashed_value, (record, _, _) in list(self._entries.items()):
+                    if record.user_id in user_ids:
+                        del self._entries[hashed_value]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+            self._polled_at = 0.0
+
+    def poll(self) -> None:
+        if not self._should_poll():
+            return
+
+        generation = get_generation(REVOCATION)
+        keys = self._missed_keys(generation)
+        self._replay(generation, keys, get_cache().get_many(keys) if keys else {})
+
+    async def apoll(self) -> None:
+        if not self._should_poll():
+            return
+
+        generation = await aget_generation(REVOCATION)
+        keys = self._missed_keys(generation)
+        self._replay(generation, keys, await get_cache().aget_many(keys) if keys else {})
+
+    def _should_poll(self) -> bool:
+        now = time.monotonic()
+        if now - self._polled_at < get_revocation_poll_interval():
+            return False
+
+        self._polled_at = now
+        return True
+
+    def _missed_keys(self, generation: int) -> List[str]:
+        if self._generation is None or not 0 < generation - self._generation <= REVOCATION_REPLAY_LIMIT:
+            return []
+
+        return [_revocation_key(missed) for missed in range(self._generation + 1, generation + 1)]
+
+    def _replay(self, generation: int, keys: List[str], entries: dict) -> None:
+        if generation == self._generation:
+            return
+
+        if self._generation is None and not self._entries:
+            # Nothing has been cached yet, so there is nothing to replay.
+            pass
+        elif not keys or len(entries) < len(keys):
+            # Too far behind, or part of the log has expired, so nothing cached can be trusted.
+            with self._lock:
+                self._entries.clear()
+        else:
+            for hashed_values, user_ids in entries.values():
+                self.evict(hashed_values, user_ids)
+
+        self._generation = generation
+
+
+local_cache = LocalTokenCache()
+
+
+def get_cached(hashed_value: str) -> Optional[Tuple[CachedToken, Any]]:
+    """
+    Return the cached record for a hashed value, with the token's user when it is active and cached.
+    """
+    use_local = local_cache_enabled()
+
+    if use_local:
+        local_cache.poll()
+        entry = local_cache.get(hashed_value)
+        if entry is not None:
+            return entry
+
+    record = get_token(hashed_value)
+    if record is None:
+        return None
+
+    user = None
+    if not record.revoked and not record.is_expired() and record.user_is_active:
+        user = get_user(record.user_id) if cache_users_enabled() else _load_user(record.user_id)
+
+    if use_local and (record.revoked or user is not None):
+        local_cache.set(hashed_value, record, user)
+
+    return record, user
+
+
+async def aget_cached(hashed_value: str) -> Optional[Tuple[CachedToken, Any]]:
+    use_local = local_cache_enabled()
+
+    if use_local:
+        await local_cache.apoll()
+        entry = local_cache.get(hashed_value)
+        if entry is not None:
+            return entry
+
+    record = await aget_token(hashed_value)
+    if record is None:
+        return None
+
+    user = None
+    if not record.revoked and not record.is_expired() and record.user_is_active:
+        user = await aget_user(record.user_id) if cache_users_enabled() else await _aload_user(record.user_id)
+
+    if use_local and (record.revoked or user is not None):
+        local_cache.set(hashed_value, record, user)
+
+    return record, user
+
+
+def get_token(hashed_value: str) -> Optional[CachedToken]:
+    record = get_cache().get(_token_key(hashed_value))
+
+    if record is None:
+        return None
+
+    return CachedToken(*record)
+
+
+async def aget_token(hashed_value: str) -> Optional[CachedToken]:
+    record = await get_cache().aget(_token_key(hashed_value))
+
+    if record is None:
+        return None
+
+    return CachedToken(*record)
+
+
+def get_user(user_id):
+    return get_cache().get(_user_key(user_id))
+
+
+async def aget_user(user_id):
+    return await get_cache().aget(_user_key(user_id))
+
+
+def _load_user(user_id):
+    # Without PAT_CACHE_USERS, users are not stored in the shared cache, where their password hashes would be readable
+    # by anything sharing it, so they are loaded by primary key instead.
+    return get_user_model()._default_manager.filter(pk=user_id).first()
+
+
+async def _aload_user(user_id):
+    return await get_user_model()._default_manager.filter(pk=user_id).afirst()
+
+
+def _token_record(token) -> CachedToken:
+    return CachedToken(
+        token.pk,
+        token.user_id,
+        token.revoked_at is not None,
+        token.user.is_active,
+        token.expires_at,
+        token.throttle_rate,
+        token.scopes,
+    )
+
+
+def _token_entries(token) -> dict:
+    entries: Dict[str, Any] = {_token_key(token.hashed_value): tuple(_token_record(token))}
+
+    if cache_users_enabled():
+        entries[_user_key(token.user_id)] = token.user
+
+    return entries
+
+
+def set_token(token) -> None:
+    get_cache().set_many(_token_entries(token), get_cache_timeout())
+
+    if local_cache_enabled():
+        local_cache.set(token.hashed_value, _token_record(token), token.user)
+
+
+async def aset_token(token) -> None:
+    await get_cache().aset_many(_token_entries(token), get_cache_timeout())
+
+    if local_cache_enabled():
+        local_cache.set(token.hashed_value, _token_record(token), token.user)
+
+
+def set_revoked(token) -> None:
+    set_revoked_many([(token.pk, token.user_id, token.hashed_value)])
+
+
+def set_revoked_many(tokens: Iterable[Tuple[Any, Any, str]]) -> None:
+    """
+    Write tombstones for revoked (token id, user id, hashed value) rows, using a single round trip to the cache.
+    """
+    tokens = list(tokens)
+
+    # Revoked tokens are kept as a tombstone, so repeated use of a revoked value is rejected without a query.
+    entries = {_token_key(hashed_value): tuple(CachedToken(pk, user_id, True, False)) for pk, user_id, hashed_value in tokens}
+
+    if not entries:
+        return
+
+    get_cache().set_many(entries, get_cache_timeout())
+
+    if local_cache_enabled():
+        publish_revocation(hashed_values=[hashed_value for _, _, hashed_value in tokens])
+
+
+def invalidate_token(hashed_value: str) -> None:
+    invalidate_tokens([hashed_value])
+
+
+def invalidate_tokens(hashed_values: Iterable[str]) -> None:
+    hashed_values = list(hashed_values)
+
+    if not hashed_values:
+        return
+
+    get_cache().delete_many([_token_key(hashed_value) for hashed_value in hashed_values])
+
+    if local_cache_enabled():
+        publish_revocation(hashed_values=hashed_values)
+
+
+def invalidate_user(user_id) -> None:
+    from django_pat.models import PersonalAccessToken
+
+    hashed_values = PersonalAccessToken.objects.filter(user_id=user_id).values_list("hashed_value", flat=True)
+
+    get_cache().delete_many([_token_key(hashed_value) for hashed_value in hashed_values] + [_user_key(user_id)])
+
+    if local_cache_enabled():
+        publish_revocation(user_ids=[user_id])
+
+
+def claim_touch(token_id, granularity: timedelta) -> bool:
+    """
+    Claim the right to write the last used time of a token for the length of the granularity.
+
+    The cache add is atomic, so only one request across all processes sharing the cache gets to write in each window.
+    """
+    seconds = granularity.total_seconds()
+    if seconds <= 0:
+        return True
+
+    return get_cache().add(_touch_key(token_id), True, seconds)
+
+
+async def aclaim_touch(token_id, granularity: timedelta) -> bool:
+    seconds = granularity.total_seconds()
+    if seconds <= 0:
+        return True
+
+    return await get_cache().aadd(_touch_key(token_id), True, seconds)
+
+
+@receiver(post_save, sender="django_pat.PersonalAccessToken")
+def token_saved(sender, instance, update_fields=None, **kwargs):
+    if not cache_enabled():
+        return
+
+    # Touching the last used time does not change the outcome of authentication.
+    if update_fields is not None and set(update_fields) == {"last_used_at"}:
+        return
+
+    if instance.revoked_at is not None:
+        set_revoked(instance)
+    else:
+        invalidate_token(instance.hashed_value)
+
+
+@receiver(post_delete, sender="django_pat.PersonalAccessToken")
+def token_deleted(sender, instance, **kwargs):
+    if not cache_enabled():
+        return
+
+    invalidate_token(instance.hashed_value)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    if not cache_enabled():
+        return
+
+    invalidate_user(instance.pk)
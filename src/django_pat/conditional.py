@@ -0,0 +1,51 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
+
+from django_pat.models import PersonalAccessToken
+
+
+def _etag(version: str) -> str:
+    return quote_etag(hashlib.blake2b(version.encode(), digest_size=16).hexdigest())
+
+
+def get_list_etag(user, variant: str = "") -> str:
+    """
+    Return the ETag of the token lists of a user, from the version of their tokens rather than the rendered lists. The
+    variant tells apart different representations of the same lists.
+
+    There is no matching Last-Modified time, since deleting tokens changes the lists without moving any of their
+    timestamps.
+    """
+    count, changed_at = PersonalAccessToken.objects.filter(user=user).version()
+
+    return _etag(f"{user.pk}:{count}:{changed_at.isoformat() if changed_at else ''}:{variant}")
+
+
+def get_row_etag(row: dict, variant: str = "") -> str:
+    """
+    Return the ETag of a single token, from the `.values()` row it is serialized from.
+    """
+    return _etag(f"{sorted(row.items())!r}:{variant}")
+
+
+def not_modified(request, etag: str):
+    """
+    Return a 304 Not Modified response when the client already has the current version, otherwise None.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+
+    return get_conditional_response(request, etag=etag)
+
+
+def set_etag(response, etag: str):
+    """
+    Add the ETag to a response. The lists are private, and clients have to revalidate them on every use.
+    """
+    response.headers.setdefault("ETag", etag)
+    patch_cache_control(response, private=True, no_cache=True)
+
+    return response
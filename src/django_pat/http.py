@@ -1,6 +1,13 @@
+from typing import Optional
+
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http.request import HttpHeaders
 from django.utils.translation import gettext
 
+PARSER_SETTINGS = {"PAT_CUSTOM_HEADER", "PAT_CUSTOM_HEADER_PREFIX", "PAT_USES_SHARED_HEADER"}
+
 
 class ParseException(Exception):
     def __init__(self, msg: str):
@@ -19,23 +26,71 @@ def get_keyword():
     return getattr(settings, "PAT_CUSTOM_HEADER_PREFIX", "Access-Token").strip()
 
 
-def parse_header(request):
-    header = get_header()
+def _to_meta_key(header: str) -> str:
+    key = header.upper().replace("-", "_")
+
+    if key in HttpHeaders.UNPREFIXED_HEADERS:
+        return key
+
+    return HttpHeaders.HTTP_PREFIX + key
+
+
+class HeaderParser:
+    """
+    Parses the token value out of a request using the header settings it was built with.
+
+    Everything derived from settings is computed once, so parsing is a single lookup in request.META and a prefix check.
+    """
+
+    def __init__(self, header: str, keyword: str, shared: bool):
+        self.header = header
+        self.keyword = keyword
+        self.shared = shared
+        self.meta_key = _to_meta_key(header)
+        self.prefix = keyword + " "
+        self.prefix_length = len(self.prefix)
+
+    @classmethod
+    def from_settings(cls) -> "HeaderParser":
+        return cls(get_header(), get_keyword(), uses_shared_header())
+
+    def parse(self, request) -> Optional[str]:
+        header_val = request.META.get(self.meta_key)
 
-    if header not in request.headers:
-        return
+        if header_val is None:
+            return None
 
-    header_val = str(request.headers.get(get_header()))
-    if not header_val:
-        raise ParseException(gettext("Invalid header"))
+        if not header_val:
+            raise ParseException(gettext("Invalid header"))
 
-    starts_with_prefix = header_val.startswith(get_keyword() + " ")
-    if not starts_with_prefix and uses_shared_header():
-        return
+        if not header_val.startswith(self.prefix):
+            if self.shared:
+                return None
 
-    if not starts_with_prefix:
-        raise ParseException(gettext("Invalid authentication type"))
+            raise ParseException(gettext("Invalid authentication type"))
 
-    _, token_val = header_val.split(get_keyword() + " ")
+        return header_val[self.prefix_length :]
 
-    return token_val
+
+_parser: Optional[HeaderParser] = None
+
+
+def get_parser() -> HeaderParser:
+    global _parser
+
+    if _parser is None:
+        _parser = HeaderParser.from_settings()
+
+    return _parser
+
+
+@receiver(setting_changed)
+def reset_parser(*, setting, **kwargs):
+    global _parser
+
+    if setting in PARSER_SETTINGS:
+        _parser = None
+
+
+def parse_header(request):
+    return get_parser().parse(request)
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+# The stages of authenticating a request, in the order they happen.
+PARSE = "parse"
+HASH = "hash"
+CACHE = "cache"
+LOOKUP = "lookup"
+USER_CHECK = "user_check"
+MARK_USED = "mark_used"
+
+# Outcomes of looking up a token. Tokens served from the cache count as a cache hit as well as a hit.
+HIT = "hit"
+MISS = "miss"
+INVALID = "invalid"
+REVOKED = "revoked"
+CACHE_HIT = "cache_hit"
+
+
+class Instrument:
+    """
+    Receives the measurements of token authentication. Subclasses override the methods for what they record.
+
+    Instruments are called inline on the request path, so they should only do cheap, in-memory work.
+    """
+
+    def timing(self, stage: str, seconds: float) -> None:
+        pass
+
+    def count(self, event: str) -> None:
+        pass
+
+
+class Trace:
+    """
+    The measurements of a single request, reported to the instruments as they are recorded.
+
+    Timings are also kept by stage, summed over repeated stages, so they can be reported back for the request.
+    """
+
+    def __init__(self, instruments: Tuple[Instrument, ...]):
+        self.instruments = instruments
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+            for instrument in self.instruments:
+                instrument.timing(name, seconds)
+
+    def count(self, event: str) -> None:
+        for instrument in self.instruments:
+            instrument.count(event)
+
+
+class NullTrace(Trace):
+    """
+    Stands in for a trace while instrumentation is disabled, so measuring a stage costs a single method call.
+    """
+
+    _stage = nullcontext()
+
+    def __init__(self):
+        super().__init__(())
+
+    def stage(self, name: str):  # type: ignore[override]
+        return self._stage
+
+    def count(self, event: str) -> None:
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+_current: ContextVar[Trace] = ContextVar("django_pat_trace", default=NULL_TRACE)
+
+_registered: List[Instrument] = []
+_instruments: Optional[Tuple[Instrument, ...]] = None
+
+
+def get_instruments() -> Tuple[Instrument, ...]:
+    """
+    Return the instruments named by PAT_INSTRUMENTS, followed by those registered in code.
+    """
+    global _instruments
+
+    if _instruments is None:
+        configured = tuple(import_string(path) for path in getattr(settings, "PAT_INSTRUMENTS", []))
+        _instruments = configured + tuple(_registered)
+
+    return _instruments
+
+
+def register(instrument: Instrument) -> None:
+    global _instruments
+
+    _registered.append(instrument)
+    _instruments = None
+
+
+def unregister(instrument: Instrument) -> None:
+    global _instruments
+
+    _registered.remove(instrument)
+    _instruments = None
+
+
+@receiver(setting_changed)
+def reset_instruments(*, setting, **kwargs):
+    global _instruments
+
+    if setting == "PAT_INSTRUMENTS":
+        _instruments = None
+
+
+def current() -> Trace:
+    return _current.get()
+
+
+@contextmanager
+def tracing(force: bool = False) -> Iterator[Trace]:
+    """
+    Make a trace current for the enclosed code, reusing the current one when tracing is already active.
+
+    Without instruments, nothing is traced unless forced, and the null trace is returned.
+    """
+    active = _current.get()
+    instruments = get_instruments()
+
+    if active is not NULL_TRACE or not (instruments or force):
+        yield active
+        return
+
+    trace = Trace(instruments)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+class Counters(Instrument):
+    """
+    Counts events and sums stage timings in process, for export in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events: Dict[str, int] = defaultdict(int)
+        self.stage_counts: Dict[str, int] = defaultdict(int)
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+
+    def timing(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stage_counts[stage] += 1
+            self.stage_seconds[stage] += seconds
+
+    def count(self, event: str) -> None:
+        with self._lock:
+            self.events[event] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.events.clear()
+            self.stage_counts.clear()
+            self.stage_seconds.clear()
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            events = sorted(self.events.items())
+            stages = sorted((stage, count, self.stage_seconds[stage]) for stage, count in self.stage_counts.items())
+
+        lines = [
+            "# HELP django_pat_auth_events_total Personal access token lookups by outcome.",
+            "# TYPE django_pat_auth_events_total counter",
+        ]
+        lines.extend(f'django_pat_auth_events_total{{event="{event}"}} {count}' for event, count in events)
+        lines.extend(
+            [
+                "# HELP django_pat_auth_stage_seconds Time spent in each stage of personal access token authentication.",
+                "# TYPE django_pat_auth_stage_seconds summary",
+            ]
+        )
+        for stage, count, seconds in stages:
+            lines.append(f'django_pat_auth_stage_seconds_count{{stage="{stage}"}} {count}')
+            lines.append(f'django_pat_auth_stage_seconds_sum{{stage="{stage}"}} {seconds!r}')
+
+        return "\n".join(lines) + "\n"
+
+
+counters = Counters()
@@ -0,0 +1,100 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from django_pat.models import PersonalAccessToken
+
+ARCHIVE_FIELDS = ["id", "user_id", "name", "description", "created_at", "revoked_at", "expires_at", "last_used_at"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete personal access tokens that were revoked, expired or last used before a cutoff. Tokens are deleted in "
+        "primary key order, one small batch at a time, so the command can run against a live table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90, help="Only purge tokens that died more than this many days ago.")
+        parser.add_argument("--revoked", action="store_true", help="Purge revoked tokens. This is the default.")
+        parser.add_argument("--expired", action="store_true", help="Purge expired tokens.")
+        parser.add_argument("--unused", action="store_true", help="Purge tokens that have not been used since the cutoff.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="The number of tokens deleted by each query.")
+        parser.add_argument("--sleep", type=float, default=0.1, help="The number of seconds to wait between batches.")
+        parser.add_argument("--archive", help="A file to append the purged tokens to as JSON lines before deleting them.")
+        parser.add_argument("--dry-run", action="store_true", help="Report the number of tokens without deleting them.")
+
+    def handle(self, *args, **options):
+        if options["days"] < 0:
+            raise CommandError("--days must not be negative")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        self.verbosity = options["verbosity"]
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        tokens = PersonalAccessToken.objects.filter(self.purge_condition(cutoff, options))
+
+        if options["dry_run"]:
+            self.stdout.write(f"{tokens.count()} tokens would be purged")
+            return
+
+        archive = open(options["archive"], "a") if options["archive"] else None
+        try:
+            purged = self.purge(tokens, archive, options["batch_size"], options["sleep"])
+        finally:
+            if archive is not None:
+                archive.close()
+
+        self.stdout.write(f"Purged {purged} tokens")
+
+    def purge_condition(self, cutoff, options) -> Q:
+        condition = Q()
+
+        if options["revoked"] or not (options["expired"] or options["unused"]):
+            condition |= Q(revoked_at__lt=cutoff)
+        if options["expired"]:
+            condition |= Q(expires_at__lt=cutoff)
+        if options["unused"]:
+            condition |= Q(last_used_at__lt=cutoff) | Q(last_used_at__isnull=True, created_at__lt=cutoff)
+
+        return condition
+
+    def purge(self, tokens, archive, batch_size: int, sleep: float) -> int:
+        purged = 0
+        last_pk = None
+
+        while True:
+            batch = tokens.order_by("pk")
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+
+            pks = list(batch.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return purged
+
+            last_pk = pks[-1]
+
+            with transaction.atomic():
+                # The condition is applied again while locking the batch, so tokens that changed since it was read are kept.
+                rows = list(tokens.filter(pk__in=pks).select_for_update().values(*ARCHIVE_FIELDS))
+
+                if archive is not None:
+                    archive.writelines(json.dumps(row, default=str) + "\n" for row in rows)
+                    archive.flush()
+
+                _, deleted = PersonalAccessToken.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+
+            purged += deleted.get(PersonalAccessToken._meta.label, 0)
+
+            if self.verbosity > 1:
+                self.stdout.write(f"Purged {purged} tokens up to id {last_pk}")
+
+            if len(pks) < batch_size:
+                return purged
+
+            time.sleep(sleep)
@@ -1,43 +1,195 @@
+import asyncio
+import random
+from functools import partial
+from typing import Dict
+from typing import Optional
+
+import django
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.http import HttpRequest
+from django.http import HttpResponse
 from django.utils.functional import SimpleLazyObject
 
-from django_pat.http import parse_header
+from django_pat import backoff
+from django_pat import instrumentation
+from django_pat.http import ParseException
+from django_pat.http import get_parser
 from django_pat.models import PersonalAccessToken
 
+try:
+    from asgiref.sync import iscoroutinefunction
+    from asgiref.sync import markcoroutinefunction
+except ImportError:  # asgiref < 3.6
+
+    from asyncio import iscoroutinefunction  # type: ignore[assignment]
+
+    def markcoroutinefunction(func):
+        func._is_coroutine = asyncio.coroutines._is_coroutine  # type: ignore
+        return func
+
+
+def server_timing_enabled() -> bool:
+    return getattr(settings, "PAT_SERVER_TIMING_ENABLED", False)
+
+
+def get_server_timing_sample_rate() -> float:
+    return getattr(settings, "PAT_SERVER_TIMING_SAMPLE_RATE", 1.0)
+
+
+def _sample_server_timing() -> bool:
+    return server_timing_enabled() and random.random() < get_server_timing_sample_rate()
+
+
+def _add_server_timing(response, timings: Dict[str, float]) -> None:
+    # Only the stages that ran are reported, so a user that was never loaded adds nothing beyond parsing the header.
+    if not timings:
+        return
+
+    metrics = ", ".join(f"pat-{stage.replace('_', '-')};dur={seconds * 1000:.3f}" for stage, seconds in timings.items())
+
+    if response.has_header("Server-Timing"):
+        metrics = f"{response['Server-Timing']}, {metrics}"
+
+    response["Server-Timing"] = metrics
+
 
 class PatAuthenticationMiddleware:
+    sync_capable = True
+    # The async path depends on the async ORM methods added in Django 4.1.
+    async_capable = django.VERSION >= (4, 1)
+
     def __init__(self, get_response):
         self.get_response = get_response
 
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
-        self.handle(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        server_timing = _sample_server_timing()
+
+        # The user is loaded lazily, so the trace stays current until the response is ready.
+        with instrumentation.tracing(force=server_timing) as trace:
+            response = self.handle(request)
+
+            if response is None:
+                response = self.get_response(request)
+
+        if server_timing:
+            _add_server_timing(response, trace.timings)
+
+        return response
+
+    async def __acall__(self, request):
+        server_timing = _sample_server_timing()
+
+        with instrumentation.tracing(force=server_timing) as trace:
+            response = await self.ahandle(request)
 
-        response = self.get_response(request)
+            if response is None:
+                response = await self.get_response(request)
+
+        if server_timing:
+            _add_server_timing(response, trace.timings)
 
         return response
 
-    def handle(self, request: HttpRequest):
-        token_value = parse_header(request)
+    def handle(self, request: HttpRequest) -> Optional[HttpResponse]:
+        token_value = self.parse(request)
 
         if token_value is None:
-            return
+            return None
+
+        # Clients that keep failing are turned away before their token costs a hash or a query.
+        if backoff.backoff_enabled() and backoff.is_blocked(request):
+            return backoff.blocked_response()
+
+        self.set_user(request, token_value)
+        return None
+
+    async def ahandle(self, request: HttpRequest) -> Optional[HttpResponse]:
+        token_value = self.parse(request)
+
+        if token_value is None:
+            return None
+
+        if backoff.backoff_enabled() and await backoff.ais_blocked(request):
+            return backoff.blocked_response()
 
+        self.set_user(request, token_value)
+        return None
+
+    def parse(self, request: HttpRequest) -> Optional[str]:
+        trace = instrumentation.current()
+
+        try:
+            with trace.stage(instrumentation.PARSE):
+                return get_parser().parse(request)
+        except ParseException:
+            trace.count(instrumentation.INVALID)
+            raise
+
+    def set_user(self, request: HttpRequest, token_value: str) -> None:
         # TODO Explore a better way to handle typing here.
         request.user = SimpleLazyObject(lambda: self.get_user(request, token_value))  # type: ignore
+        request.auser = partial(self.aget_user, request, token_value)  # type: ignore
 
     def get_user(self, request: HttpRequest, token_value: str):
-        # See: https://github.com/typeddjango/django-stubs/issues/728
-        token = PersonalAccessToken.objects.select_related("user").first_valid_token(token_value)  # type: ignore
+        trace = instrumentation.current()
+        token = PersonalAccessToken.objects.get_for_authentication(token_value)
 
         if not token:
-            return AnonymousUser()
+            return self.reject(request)
 
-        if not token.user.is_active:
-            return AnonymousUser()
+        with trace.stage(instrumentation.USER_CHECK):
+            is_active = token.user.is_active
 
-        token.mark_used()
+        if not is_active:
+            return self.reject(request)
+
+        with trace.stage(instrumentation.MARK_USED):
+            token.mark_used()
 
         # TODO Explore better typing and if _cached_user is worthwhile
         request._cached_user = token.user  # type: ignore
         return request._cached_user  # type: ignore
+
+    async def aget_user(self, request: HttpRequest, token_value: str):
+        if not hasattr(request, "_pat_acached_user"):
+            request._pat_acached_user = await self._aget_user(request, token_value)  # type: ignore
+
+        return request._pat_acached_user  # type: ignore
+
+    async def _aget_user(self, request: HttpRequest, token_value: str):
+        trace = instrumentation.current()
+        token = await PersonalAccessToken.objects.aget_for_authentication(token_value)
+
+        if not token:
+            return await self.areject(request)
+
+        with trace.stage(instrumentation.USER_CHECK):
+            is_active = token.user.is_active
+
+        if not is_active:
+            return await self.areject(request)
+
+        with trace.stage(instrumentation.MARK_USED):
+            await token.amark_used()
+
+        request._cached_user = token.user  # type: ignore
+        return token.user
+
+    def reject(self, request: HttpRequest):
+        if backoff.backoff_enabled():
+            backoff.record_failure(request)
+
+        return AnonymousUser()
+
+    async def areject(self, request: HttpRequest):
+        if backoff.backoff_enabled():
+            await backoff.arecord_failure(request)
+
+        return AnonymousUser()
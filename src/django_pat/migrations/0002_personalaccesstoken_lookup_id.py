@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:09
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_pat", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="personalaccesstoken",
+            name="lookup_id",
+            field=models.CharField(editable=False, max_length=12, null=True, unique=True),
+        ),
+    ]
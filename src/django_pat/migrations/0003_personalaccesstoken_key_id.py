@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:32
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_pat", "0002_personalaccesstoken_lookup_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="personalaccesstoken",
+            name="key_id",
+            field=models.CharField(blank=True, default="", editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:05
+
+from django.db import migrations
+from django.db import models
+from django.db.models import Q
+
+VALID_HASHED_VALUE = models.UniqueConstraint(
+    fields=["hashed_value"],
+    condition=Q(revoked_at__isnull=True),
+    name="django_pat_valid_hashed_value",
+)
+
+# Without partial indexes, as on MySQL, the constraint is not created, so a plain index keeps lookups by hashed value
+# from scanning the table.
+HASHED_VALUE = models.Index(fields=["hashed_value"], name="django_pat_hashed_value")
+
+
+def add_valid_token_indexes(apps, schema_editor):
+    model = apps.get_model("django_pat", "PersonalAccessToken")
+    features = schema_editor.connection.features
+
+    if features.supports_partial_indexes:
+        schema_editor.add_constraint(model, VALID_HASHED_VALUE)
+    else:
+        schema_editor.add_index(model, HASHED_VALUE)
+
+
+def remove_valid_token_indexes(apps, schema_editor):
+    model = apps.get_model("django_pat", "PersonalAccessToken")
+    features = schema_editor.connection.features
+
+    if features.supports_partial_indexes:
+        schema_editor.remove_constraint(model, VALID_HASHED_VALUE)
+    else:
+        schema_editor.remove_index(model, HASHED_VALUE)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_pat", "0003_personalaccesstoken_key_id"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(model_name="personalaccesstoken", constraint=VALID_HASHED_VALUE),
+            ],
+            database_operations=[
+                migrations.RunPython(add_valid_token_indexes, remove_valid_token_indexes),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="personalaccesstoken",
+            name="hashed_value",
+            field=models.CharField(editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:40
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_pat", "0004_valid_token_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="personalaccesstoken",
+            name="expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
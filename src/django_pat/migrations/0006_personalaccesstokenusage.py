@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:20
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_pat", "0005_personalaccesstoken_expires_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PersonalAccessTokenUsage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(editable=False)),
+                ("count", models.PositiveBigIntegerField(default=0, editable=False)),
+                (
+                    "token",
+                    models.ForeignKey(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="usage",
+                        to="django_pat.personalaccesstoken",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("token", "date"), name="django_pat_usage_token_date")],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+import django.core.validators
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_pat", "0006_personalaccesstokenusage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="personalaccesstoken",
+            name="throttle_rate",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Overrides the default rate limit of the token, such as 100/min.",
+                max_length=32,
+                validators=[django.core.validators.RegexValidator("^\\d+/[smhd]", "Enter a rate such as 100/min.")],
+            ),
+        ),
+    ]
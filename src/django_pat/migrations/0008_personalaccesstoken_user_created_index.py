@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_pat", "0007_personalaccesstoken_throttle_rate"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="personalaccesstoken",
+            index=models.Index(fields=["user", "created_at", "id"], name="django_pat_user_created"),
+        ),
+    ]
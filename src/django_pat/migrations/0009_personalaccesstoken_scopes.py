@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:00
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_pat", "0008_personalaccesstoken_user_created_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="personalaccesstoken",
+            name="scopes",
+            field=models.PositiveBigIntegerField(
+                blank=True,
+                help_text="The bits of the scopes in PAT_SCOPES the token is limited to, or empty for full access.",
+                null=True,
+            ),
+        ),
+    ]
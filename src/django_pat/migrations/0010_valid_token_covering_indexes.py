@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+from django.db import migrations
+from django.db import models
+from django.db.models import Q
+
+# The columns authentication loads with a valid token, so that finding one is an index only scan. They are included once
+# every one of them exists, rather than growing the indexes with each migration that adds a column.
+COVERED_FIELDS = ["id", "user", "key_id", "revoked_at", "expires_at", "throttle_rate", "scopes", "last_used_at"]
+
+VALID_HASHED_VALUE = "django_pat_valid_hashed_value"
+
+VALID_LOOKUP_ID = models.Index(
+    fields=["lookup_id"],
+    condition=Q(revoked_at__isnull=True),
+    include=["hashed_value", *COVERED_FIELDS],
+    name="django_pat_valid_lookup_id",
+)
+
+
+def _rebuild_valid_hashed_value(model, schema_editor, include):
+    # The unique constraint of migration 0004 is replaced by an equal one under the same name, built next to it first so
+    # that writes are never blocked and hashed values stay unique throughout.
+    quote = schema_editor.quote_name
+    table = quote(model._meta.db_table)
+    building = quote(f"{VALID_HASHED_VALUE}_new")
+    columns = ", ".join(quote(model._meta.get_field(name).column) for name in include)
+    include_sql = f" INCLUDE ({columns})" if include else ""
+
+    schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {building}")
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX CONCURRENTLY {building} ON {table} ({quote('hashed_value')}){include_sql} "
+        f"WHERE {quote('revoked_at')} IS NULL"
+    )
+    schema_editor.execute(f"DROP INDEX CONCURRENTLY {quote(VALID_HASHED_VALUE)}")
+    schema_editor.execute(f"ALTER INDEX {building} RENAME TO {quote(VALID_HASHED_VALUE)}")
+
+
+def add_covering_indexes(apps, schema_editor):
+    # Only PostgreSQL supports covering indexes. Elsewhere the indexes of migration 0004 are kept as they are.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    model = apps.get_model("django_pat", "PersonalAccessToken")
+    _rebuild_valid_hashed_value(model, schema_editor, COVERED_FIELDS)
+    schema_editor.add_index(model, VALID_LOOKUP_ID, concurrently=True)
+
+
+def remove_covering_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    model = apps.get_model("django_pat", "PersonalAccessToken")
+    schema_editor.remove_index(model, VALID_LOOKUP_ID, concurrently=True)
+    _rebuild_valid_hashed_value(model, schema_editor, [])
+
+
+class Migration(migrations.Migration):
+    # Indexes are only built concurrently outside of a transaction.
+    atomic = False
+
+    dependencies = [
+        ("django_pat", "0009_personalaccesstoken_scopes"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_covering_indexes, remove_covering_indexes),
+    ]
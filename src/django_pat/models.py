@@ -1,40 +1,200 @@
 import hashlib
 import hmac
+import secrets
+import string
 import uuid
+from datetime import datetime
+from datetime import timedelta
+from itertools import islice
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
 from typing import Optional
 from typing import Tuple
+from typing import Union
 
 from django.conf import settings
+from django.core.validators import RegexValidator
+from django.db import connections
 from django.db import models
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Q
 from django.db.models import QuerySet
+from django.db.models import Subquery
+from django.db.models import Sum
 from django.utils import timezone
 from django.utils.encoding import force_bytes
 
+from django_pat import cache as token_cache
+from django_pat import instrumentation
+from django_pat import prefilter
+from django_pat import scopes as token_scopes
+from django_pat import write_behind
 
-def _get_secret():
-    try:
-        secret = getattr(settings, "PAT_SECRET")
-    except AttributeError:
-        raise ValueError("PAT_SECRET must be configured in settings")
+LEGACY_KEY_ID = ""
+
+
+def _get_secrets() -> Dict[str, str]:
+    """
+    Return the configured secrets by key id, with the current secret first.
+
+    The secrets in PAT_SECRETS take precedence, and PAT_SECRET is always available under the legacy key id, so tokens
+    hashed before keyed secrets were configured continue to work.
+    """
+    keyed_secrets = {key_id: secret for key_id, secret in getattr(settings, "PAT_SECRETS", {}).items() if secret}
 
-    if not secret:
+    legacy_secret = getattr(settings, "PAT_SECRET", None)
+    if legacy_secret:
+        keyed_secrets.setdefault(LEGACY_KEY_ID, legacy_secret)
+
+    if not keyed_secrets:
         raise ValueError("PAT_SECRET must be configured in settings")
 
-    return secret
+    return keyed_secrets
+
+
+def _get_current_key_id() -> str:
+    return next(iter(_get_secrets()))
+
+
+def _get_secret(key_id: Optional[str] = None) -> str:
+    keyed_secrets = _get_secrets()
+
+    if key_id is None:
+        return next(iter(keyed_secrets.values()))
+
+    try:
+        return keyed_secrets[key_id]
+    except KeyError:
+        raise ValueError(f"No PAT secret is configured for key id '{key_id}'")
+
+
+TOKEN_PREFIX = "pat"
+LOOKUP_ID_LENGTH = 12
+LOOKUP_ID_ALPHABET = string.ascii_lowercase + string.digits
+
+
+def _get_token_format() -> str:
+    token_format = getattr(settings, "PAT_TOKEN_FORMAT", "prefixed")
+
+    if token_format not in ("prefixed", "uuid"):
+        raise ValueError("PAT_TOKEN_FORMAT must be either 'prefixed' or 'uuid'")
+
+    return token_format
+
+
+def _generate_value() -> Tuple[Optional[str], Union[str, uuid.UUID]]:
+    # UUID tokens are returned as uuid.UUID, as create_token did before prefixed tokens.
+    if _get_token_format() == "uuid":
+        return None, uuid.uuid4()
+
+    lookup_id = "".join(secrets.choice(LOOKUP_ID_ALPHABET) for _ in range(LOOKUP_ID_LENGTH))
+
+    return lookup_id, f"{TOKEN_PREFIX}_{lookup_id}_{secrets.token_urlsafe(32)}"
+
+
+def _parse_lookup_id(value) -> Optional[str]:
+    """
+    Return the public lookup id embedded in a prefixed token value, or None for legacy UUID values.
+    """
+    parts = str(value).split("_", 2)
+
+    if len(parts) != 3 or parts[0] != TOKEN_PREFIX or len(parts[1]) != LOOKUP_ID_LENGTH:
+        return None
+
+    return parts[1]
+
+
+def _get_last_used_granularity() -> timedelta:
+    return timedelta(seconds=getattr(settings, "PAT_LAST_USED_GRANULARITY", 60))
+
+
+def _get_default_lifetime() -> Optional[timedelta]:
+    lifetime = getattr(settings, "PAT_DEFAULT_LIFETIME", None)
+
+    if lifetime is None:
+        return None
+
+    return timedelta(seconds=lifetime)
+
+
+def _default_expires_at() -> Optional[datetime]:
+    lifetime = _get_default_lifetime()
+
+    if lifetime is None:
+        return None
+
+    return timezone.now() + lifetime
+
+
+# Rates use the REST framework format, a number of requests per second, minute, hour or day such as "100/min".
+validate_throttle_rate = RegexValidator(r"^\d+/[smhd]", "Enter a rate such as 100/min.")
 
 
-def _hash_value(value):
-    secret = _get_secret()
+def _get_bulk_create_batch_size() -> int:
+    return getattr(settings, "PAT_BULK_CREATE_BATCH_SIZE", 500)
 
-    return hmac.new(force_bytes(secret), msg=force_bytes(value), digestmod=hashlib.sha256).hexdigest()
 
+def _hmac(secret: bytes, value) -> str:
+    return hmac.new(secret, msg=force_bytes(value), digestmod=hashlib.sha256).hexdigest()
 
-class PersonalAccessTokenQuerySet(QuerySet):
+
+def _hash_value(value, key_id: Optional[str] = None):
+    secret = _get_secret(key_id)
+
+    return _hmac(force_bytes(secret), value)
+
+
+def _hash_value_for_all_keys(value) -> List[str]:
+    return [_hash_value(value, key_id) for key_id in _get_secrets()]
+
+
+def _prefilter_items(value) -> List[str]:
+    lookup_id = _parse_lookup_id(value)
+
+    if lookup_id is not None:
+        return [lookup_id]
+
+    return _hash_value_for_all_keys(value)
+
+
+def _scope_mask(names: Optional[Iterable[str]]) -> Optional[int]:
+    # Tokens created without scopes have full access, as tokens did before scopes existed.
+    return token_scopes.to_mask(names) if names else None
+
+
+class TokenEntry(NamedTuple):
+    """
+    A token to create with PersonalAccessTokenManager.bulk_create_tokens.
+
+    Without an expiry the token expires after the default lifetime, and without scopes it has full access.
+    """
+
+    user: Any
+    name: str
+    description: str = ""
+    expires_at: Optional[datetime] = None
+    scopes: Optional[Iterable[str]] = None
+
+
+class PersonalAccessTokenQuerySet(QuerySet["PersonalAccessToken"]):
     def valid(self):
-        return self.filter(revoked_at__isnull=True)
+        # Expiry changes with the current time, so it cannot be part of the partial index condition. It is checked in the
+        # same query on the single token the index finds, from the index entry where migration 0010 includes expires_at.
+        return self.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()), revoked_at__isnull=True)
 
     def with_value(self, value: str):
-        return self.filter(hashed_value=_hash_value(value))
+        hashed_values = _hash_value_for_all_keys(value)
+
+        if len(hashed_values) == 1:
+            return self.filter(hashed_value=hashed_values[0])
+
+        return self.filter(hashed_value__in=hashed_values)
 
     def with_valid_value(self, value: str):
         return self.valid().with_value(value)
@@ -42,61 +202,489 @@ class PersonalAccessTokenQuerySet(QuerySet):
     def first_valid_token(self, value: str) -> Optional["PersonalAccessToken"]:
         return self.with_valid_value(value).first()
 
+    def revoke(self) -> int:
+        """
+        Revoke every valid token in the queryset with a single UPDATE, returning the number of tokens revoked.
 
-class PersonalAccessTokenManager(models.Manager):
-    def get_queryset(self):
-        return PersonalAccessTokenQuerySet(self.model, using=self._db)
+        Updates do not send post_save, so cached lookups of the revoked tokens are replaced with tombstones in one batch.
+        """
+        valid = self.valid()
 
-    def valid(self):
-        return self.get_queryset().valid()
+        if not token_cache.cache_enabled():
+            return valid.update(revoked_at=timezone.now())
 
-    def with_value(self, value: str):
-        return self.get_queryset().with_value(value)
+        # The tokens are read before the UPDATE, which takes them out of any queryset that filters on revoked_at.
+        tokens = list(valid.values_list("pk", "user_id", "hashed_value"))
+        count = valid.update(revoked_at=timezone.now())
+
+        if count:
+            token_cache.set_revoked_many(tokens)
+
+        return count
+
+    def set_throttle_rate(self, rate: str) -> int:
+        """
+        Override the rate limit of every token in the queryset, or restore the default with an empty rate.
+        """
+        if rate:
+            validate_throttle_rate(rate)
+
+        hashed_values = list(self.values_list("hashed_value", flat=True)) if token_cache.cache_enabled() else []
+        count = self.update(throttle_rate=rate)
+
+        token_cache.invalidate_tokens(hashed_values)
+
+        return count
+
+    def with_total_requests(self) -> "PersonalAccessTokenQuerySet":
+        """
+        Annotate the tokens with the requests of all their days of usage as `total_requests`, or None for tokens never
+        used. The total of each token is summed in a correlated subquery, so usage rows are not joined to the tokens
+        and grouped back.
+        """
+        usage = (
+            PersonalAccessTokenUsage.objects.filter(token=OuterRef("pk"))
+            .order_by()
+            .values("token")
+            .annotate(total=Sum("count"))
+            .values("total")
+        )
+
+        return self.annotate(total_requests=Subquery(usage))
+
+    def version(self) -> Tuple[int, Optional[datetime]]:
+        """
+        Return the number of tokens in the queryset and the latest time one of them was created, revoked or used, in a
+        single aggregate query over the tokens alone. Together they change whenever a list of the tokens would, so they
+        can validate cached lists without loading them.
+
+        Usage is left out, so the query does not grow with every day a token was used. Using a token moves its last used
+        time instead, so total requests in lists validated this way lag behind by as long as last used times do.
+        """
+        aggregate = self.aggregate(
+            count=Count("id"),
+            created_at=Max("created_at"),
+            revoked_at=Max("revoked_at"),
+            last_used_at=Max("last_used_at"),
+        )
+        changes = [aggregate[field] for field in ("created_at", "revoked_at", "last_used_at") if aggregate[field]]
+
+        return aggregate["count"], max(changes, default=None)
+
+
+# The manager exposes every queryset method, typed with the queryset they are called on.
+_PersonalAccessTokenBaseManager = models.Manager.from_queryset(PersonalAccessTokenQuerySet)
+
+
+class PersonalAccessTokenManager(_PersonalAccessTokenBaseManager["PersonalAccessToken"]):
+    def get_queryset(self) -> PersonalAccessTokenQuerySet:
+        return PersonalAccessTokenQuerySet(self.model, using=self._db)
 
     def first_valid_token(self, value: str) -> Optional["PersonalAccessToken"]:
         return self.get_queryset().with_valid_value(value).first()
 
+    def revoke_all_for_user(self, user) -> int:
+        return self.get_queryset().filter(user=user).revoke()
+
+    def get_for_authentication(self, value: str) -> Optional["PersonalAccessToken"]:
+        trace = instrumentation.current()
+
+        if prefilter.prefilter_enabled() and not prefilter.token_prefilter.might_contain(_prefilter_items(value)):
+            trace.count(instrumentation.MISS)
+            return None
+
+        use_cache = token_cache.cache_enabled()
+        hashed_value = None
+
+        if use_cache:
+            with trace.stage(instrumentation.HASH):
+                hashed_value = _hash_value(value)
+
+            with trace.stage(instrumentation.CACHE):
+                cached = token_cache.get_cached(hashed_value)
+
+            if cached is not None:
+                record, user = cached
+                if record.revoked or record.is_expired():
+                    trace.count(instrumentation.REVOKED)
+                    return None
+
+                # Inactive users are rare and rejected by the caller, so they are always loaded from the database.
+                if user is not None:
+                    trace.count(instrumentation.CACHE_HIT)
+                    trace.count(instrumentation.HIT)
+                    return self._from_cached_record(record, hashed_value, user)
+
+        with trace.stage(instrumentation.LOOKUP):
+            token = self._authentication_queryset(value).first()
+
+        token = self._traced_verified(trace, token, value, hashed_value)
+
+        if token is not None and use_cache and token.key_id == _get_current_key_id():
+            token_cache.set_token(token)
+
+        return token
+
+    async def aget_for_authentication(self, value: str) -> Optional["PersonalAccessToken"]:
+        trace = instrumentation.current()
+
+        if prefilter.prefilter_enabled() and not await prefilter.token_prefilter.amight_contain(_prefilter_items(value)):
+            trace.count(instrumentation.MISS)
+            return None
+
+        use_cache = token_cache.cache_enabled()
+        hashed_value = None
+
+        if use_cache:
+            with trace.stage(instrumentation.HASH):
+                hashed_value = _hash_value(value)
+
+            with trace.stage(instrumentation.CACHE):
+                cached = await token_cache.aget_cached(hashed_value)
+
+            if cached is not None:
+                record, user = cached
+                if record.revoked or record.is_expired():
+                    trace.count(instrumentation.REVOKED)
+                    return None
+
+                if user is not None:
+                    trace.count(instrumentation.CACHE_HIT)
+                    trace.count(instrumentation.HIT)
+                    return self._from_cached_record(record, hashed_value, user)
+
+        with trace.stage(instrumentation.LOOKUP):
+            token = await self._authentication_queryset(value).afirst()
+
+        token = self._traced_verified(trace, token, value, hashed_value)
+
+        if token is not None and use_cache and token.key_id == _get_current_key_id():
+            await token_cache.aset_token(token)
+
+        return token
+
+    def _traced_verified(
+        self,
+        trace: instrumentation.Trace,
+        token: Optional["PersonalAccessToken"],
+        value: str,
+        current_hashed_value: Optional[str],
+    ) -> Optional["PersonalAccessToken"]:
+        # Revoked and expired tokens are left out of the lookup, so without a cache they are counted as misses.
+        if token is None:
+            trace.count(instrumentation.MISS)
+            return None
+
+        with trace.stage(instrumentation.HASH):
+            token = self._verified(token, value, current_hashed_value)
+
+        trace.count(instrumentation.HIT if token is not None else instrumentation.INVALID)
+        return token
+
+    def _authentication_queryset(self, value: str):
+        # The token and its user are resolved in a single query, loading only the token columns authentication needs.
+        queryset = (
+            self.get_queryset()
+            .select_related("user")
+            .only(
+                "id",
+                "user",
+                "key_id",
+                "hashed_value",
+                "revoked_at",
+                "expires_at",
+                "throttle_rate",
+                "scopes",
+                "last_used_at",
+            )
+            .valid()
+        )
+
+        lookup_id = _parse_lookup_id(value)
+        if lookup_id is None:
+            return queryset.with_value(value)
+
+        return queryset.filter(lookup_id=lookup_id)
+
+    def _verified(
+        self,
+        token: Optional["PersonalAccessToken"],
+        value: str,
+        current_hashed_value: Optional[str],
+    ) -> Optional["PersonalAccessToken"]:
+        """
+        Check the value against the hash of the token found, using the key the token was hashed with.
+
+        Prefixed tokens are found by their public lookup id, so this is where their secret is checked. Tokens hashed with
+        an old key are queued to be rehashed with the current one.
+        """
+        if token is None:
+            return None
+
+        current_key_id = _get_current_key_id()
+
+        if token.key_id == current_key_id and current_hashed_value is not None:
+            hashed_value = current_hashed_value
+        else:
+            try:
+                hashed_value = _hash_value(value, token.key_id)
+            except ValueError:
+                # The key the token was hashed with has been removed from settings.
+                return None
+
+        if not hmac.compare_digest(token.hashed_value, hashed_value):
+            return None
+
+        if token.key_id != current_key_id:
+            rehashed_value = _hash_value(value, current_key_id)
+            write_behind.rehash.add(token.pk, token.key_id, rehashed_value, current_key_id)
+
+            if prefilter.prefilter_enabled() and token.lookup_id is None:
+                prefilter.token_prefilter.add(rehashed_value)
+
+        return token
+
+    def _from_cached_record(self, record: token_cache.CachedToken, hashed_value: str, user) -> "PersonalAccessToken":
+        token = self.model.from_db(
+            self.db,
+            ["id", "user_id", "hashed_value", "revoked_at", "expires_at", "throttle_rate", "scopes"],
+            [record.token_id, record.user_id, hashed_value, None, record.expires_at, record.throttle_rate, record.scopes],
+        )
+        token.user = user
+
+        return token
+
     def create_token(
         self,
         user,
         name: str,
         description: Optional[str] = None,
         commit: bool = True,
-    ) -> Tuple["PersonalAccessToken", uuid.UUID]:
-        token_val = uuid.uuid4()
-        hashed_val = _hash_value(token_val)
+        expires_at: Optional[datetime] = None,
+        throttle_rate: str = "",
+        scopes: Optional[Iterable[str]] = None,
+    ) -> Tuple["PersonalAccessToken", Union[str, uuid.UUID]]:
+        lookup_id, token_val = _generate_value()
+        key_id = _get_current_key_id()
+        hashed_val = _hash_value(token_val, key_id)
 
-        token = PersonalAccessToken(user=user, hashed_value=hashed_val, name=name, description=description or "")
+        token = PersonalAccessToken(
+            user=user,
+            lookup_id=lookup_id,
+            key_id=key_id,
+            hashed_value=hashed_val,
+            name=name,
+            description=description or "",
+            expires_at=expires_at or _default_expires_at(),
+            throttle_rate=throttle_rate,
+            scopes=_scope_mask(scopes),
+        )
 
         if commit:
             token.save()
 
         return token, token_val
 
+    def bulk_create_tokens(
+        self,
+        entries: Iterable[TokenEntry],
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Tuple["PersonalAccessToken", Union[str, uuid.UUID]]]:
+        """
+        Create a token for each TokenEntry, yielding every token with its plain text value.
+
+        Entries are consumed lazily and inserted with one bulk insert per batch, so tokens are only created as the
+        iterator is consumed, and each value is available as soon as its batch is saved. Backends that cannot return ids
+        from bulk inserts, such as MySQL, read the ids of each batch back in one more query.
+        """
+        batch_size = batch_size or _get_bulk_create_batch_size()
+        key_id = _get_current_key_id()
+        secret = force_bytes(_get_secret(key_id))
+        expires_at = _default_expires_at()
+        pending = iter(entries)
+
+        while True:
+            batch = list(islice(pending, batch_size))
+            if not batch:
+                return
+
+            tokens = []
+            values = []
+            for entry in batch:
+                lookup_id, token_val = _generate_value()
+                tokens.append(
+                    self.model(
+                        user=entry.user,
+                        lookup_id=lookup_id,
+                        key_id=key_id,
+                        hashed_value=_hmac(secret, token_val),
+                        name=entry.name,
+                        description=entry.description or "",
+                        expires_at=entry.expires_at or expires_at,
+                        scopes=_scope_mask(entry.scopes),
+                    )
+                )
+                values.append(token_val)
+
+            self.bulk_create(tokens)
+
+            if not connections[self.db].features.can_return_rows_from_bulk_insert:
+                # The hashes are unique among valid tokens, so they find the rows of both token formats.
+                ids = dict(
+                    self.filter(hashed_value__in=[token.hashed_value for token in tokens], revoked_at__isnull=True)
+                    .values_list("hashed_value", "pk")
+                    .order_by()
+                )
+                for token in tokens:
+                    token.pk = ids[token.hashed_value]
+
+            # Bulk inserts do not send post_save, so the prefilter is told about the batch directly.
+            if prefilter.prefilter_enabled():
+                prefilter.token_prefilter.add_many([prefilter.token_item(token) for token in tokens], self.db)
+
+            yield from zip(tokens, values)
+
 
 class PersonalAccessToken(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, editable=False)
-    hashed_value = models.CharField(max_length=64, db_index=True, editable=False)
+    lookup_id = models.CharField(max_length=LOOKUP_ID_LENGTH, unique=True, null=True, editable=False)
+    key_id = models.CharField(max_length=32, blank=True, default=LEGACY_KEY_ID, editable=False)
+    hashed_value = models.CharField(max_length=64, editable=False)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=False)
     created_at = models.DateTimeField(auto_now_add=True)
     revoked_at = models.DateTimeField(null=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    throttle_rate = models.CharField(
+        max_length=32,
+        blank=True,
+        default="",
+        validators=[validate_throttle_rate],
+        help_text="Overrides the default rate limit of the token, such as 100/min.",
+    )
+    scopes = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        help_text="The bits of the scopes in PAT_SCOPES the token is limited to, or empty for full access.",
+    )
     last_used_at = models.DateTimeField(null=True)
 
     objects = PersonalAccessTokenManager()
 
     class Meta:
         unique_together = ["user", "name"]
+        indexes = [
+            # Token lists are ordered newest first and paged by (created_at, id), within the tokens of one user.
+            models.Index(fields=["user", "created_at", "id"], name="django_pat_user_created"),
+        ]
+        constraints = [
+            # Authentication only looks up valid tokens, so revoked ones are left out of the index. Backends without
+            # partial indexes get a plain hashed_value index from migration 0004 instead, and on PostgreSQL migration
+            # 0010 includes the columns authentication loads, along with a covering index of valid lookup ids.
+            models.UniqueConstraint(
+                fields=["hashed_value"],
+                condition=Q(revoked_at__isnull=True),
+                name="django_pat_valid_hashed_value",
+            ),
+        ]
+
+    def has_scopes(self, mask: int) -> bool:
+        """
+        Return whether the token has every scope in the mask. Tokens without scopes have full access.
+        """
+        return self.scopes is None or self.scopes & mask == mask
+
+    @property
+    def scope_names(self) -> Optional[List[str]]:
+        return token_scopes.to_names(self.scopes) if self.scopes is not None else None
 
     def revoke(self, commit=True):
         self.revoked_at = timezone.now()
         if commit:
-            self.save()
+            self.save(update_fields=["revoked_at"])
 
     def mark_used(self, commit=True):
-        self.last_used_at = timezone.now()
-        if commit:
-            self.save()
+        now = timezone.now()
+        if not commit:
+            self.last_used_at = now
+            return
+
+        if write_behind.usage_tracking_enabled():
+            write_behind.usage.add(self.pk, now.date())
+
+        granularity = _get_last_used_granularity()
+        if not self._should_touch(now, granularity):
+            return
+
+        self.last_used_at = now
+
+        if write_behind.write_behind_enabled():
+            write_behind.last_used.add(self.pk, now)
+            return
+
+        # Only the one column is written, and only if it is stale, so concurrent requests with the same token result
+        # in a single write and can never overwrite a revocation.
+        self._stale_last_used(now, granularity).update(last_used_at=now)
+
+    async def amark_used(self):
+        now = timezone.now()
+        granularity = _get_last_used_granularity()
+
+        if write_behind.usage_tracking_enabled():
+            write_behind.usage.add(self.pk, now.date())
+
+        if self._used_within(now, granularity):
+            return
+
+        if token_cache.cache_enabled() and not await token_cache.aclaim_touch(self.pk, granularity):
+            return
+
+        self.last_used_at = now
+
+        if write_behind.write_behind_enabled():
+            write_behind.last_used.add(self.pk, now)
+            return
+
+        await self._stale_last_used(now, granularity).aupdate(last_used_at=now)
+
+    def _should_touch(self, now: datetime, granularity: timedelta) -> bool:
+        if self._used_within(now, granularity):
+            return False
+
+        if token_cache.cache_enabled():
+            return token_cache.claim_touch(self.pk, granularity)
+
+        return True
+
+    def _used_within(self, now: datetime, granularity: timedelta) -> bool:
+        if "last_used_at" in self.get_deferred_fields():
+            return False
+
+        return self.last_used_at is not None and self.last_used_at > now - granularity
+
+    def _stale_last_used(self, now: datetime, granularity: timedelta):
+        return PersonalAccessToken.objects.filter(
+            Q(last_used_at__isnull=True) | Q(last_used_at__lt=now - granularity),
+            pk=self.pk,
+        )
 
     def __str__(self):
         return self.name
+
+
+class PersonalAccessTokenUsage(models.Model):
+    """
+    The number of requests authenticated with a token on a single day.
+    """
+
+    token = models.ForeignKey(PersonalAccessToken, on_delete=models.CASCADE, related_name="usage", editable=False)
+    date = models.DateField(editable=False)
+    count = models.PositiveBigIntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["token", "date"], name="django_pat_usage_token_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.token_id} {self.date}"
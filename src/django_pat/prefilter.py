@@ -0,0 +1,256 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from django_pat import cache as token_cache
+
+logger = logging.getLogger(__name__)
+
+GENERATION = "prefilter"
+
+# The minimum number of seconds between two builds of the filter, including attempts that failed.
+REBUILD_SPACING = 5
+
+# Tokens announced to other processes are kept for this many seconds, and a process further behind than the replay limit
+# rebuilds its filter instead of replaying them.
+ANNOUNCEMENT_TIMEOUT = 3600
+ANNOUNCEMENT_REPLAY_LIMIT = 100
+
+
+def prefilter_enabled() -> bool:
+    return getattr(settings, "PAT_PREFILTER_ENABLED", False)
+
+
+def get_false_positive_rate() -> float:
+    return getattr(settings, "PAT_PREFILTER_FALSE_POSITIVE_RATE", 0.01)
+
+
+def get_rebuild_interval() -> float:
+    return getattr(settings, "PAT_PREFILTER_REBUILD_INTERVAL", 300)
+
+
+def get_poll_interval() -> float:
+    return getattr(settings, "PAT_PREFILTER_POLL_INTERVAL", 1)
+
+
+def _announcement_key(generation: int) -> str:
+    return f"django_pat:prefilter:{generation}"
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, false_positive_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def token_item(token) -> str:
+    """
+    Return the value a token is known by in the filter: the lookup id of prefixed tokens or the hash of legacy ones.
+    """
+    return token.lookup_id if token.lookup_id is not None else token.hashed_value
+
+
+class TokenPrefilter:
+    """
+    An in-process Bloom filter of the valid tokens, used to reject unknown tokens without querying the database.
+
+    The filter never has false negatives for tokens created before it was built, and tokens created in this process are
+    added as they are saved. Tokens created in other processes are announced under an increasing generation in the
+    cache once they are committed. On a miss, each process replays the announcements it has not seen at most every
+    PAT_PREFILTER_POLL_INTERVAL seconds, adding their tokens to its filter. Until it has caught up, every token is
+    treated as a possible match, and a process that cannot replay them rebuilds its filter instead.
+
+    The filter is built in a background thread on first use, and rebuilt periodically to drop revoked tokens.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter: Optional[BloomFilter] = None
+        self._generation = 0
+        self._shared_generation = 0
+        self._polled_at = 0.0
+        self._built_at = 0.0
+        self._rebuilding = False
+        self._next_rebuild = 0.0
+
+    def might_contain(self, items: Iterable[str]) -> bool:
+        items = list(items)
+        bloom = self._usable_filter()
+        if bloom is None or any(item in bloom for item in items):
+            return True
+
+        # Only a rejection needs the filter to be current, so announcements are only polled for on misses, and between
+        # polls a rejection does not leave the process.
+        if self._should_poll():
+            generation = token_cache.get_generation(GENERATION)
+            keys = self._missed_keys(generation)
+            self._replay(bloom, generation, keys, token_cache.get_cache().get_many(keys) if keys else {})
+
+        # Replaying announcements may have added the items.
+        return self._is_stale() or any(item in bloom for item in items)
+
+    async def amight_contain(self, items: Iterable[str]) -> bool:
+        items = list(items)
+        bloom = self._usable_filter()
+        if bloom is None or any(item in bloom for item in items):
+            return True
+
+        if self._should_poll():
+            generation = await token_cache.aget_generation(GENERATION)
+            keys = self._missed_keys(generation)
+            self._replay(bloom, generation, keys, await token_cache.get_cache().aget_many(keys) if keys else {})
+
+        return self._is_stale() or any(item in bloom for item in items)
+
+    def add(self, item: str, using: Optional[str] = None) -> None:
+        self.add_many([item], using)
+
+    def add_many(self, items: Iterable[str], using: Optional[str] = None) -> None:
+        with self._lock:
+            bloom = self._filter
+            if bloom is not None:
+                for item in items:
+                    bloom.add(item)
+
+        # Other processes rebuilding from the database only see the tokens once they are committed, so the tokens are only
+        # announced then. Announcing them earlier could mark a filter built without them as current.
+        items = list(items)
+        transaction.on_commit(lambda: self._announce(bloom, items), using=using)
+
+    def _announce(self, bloom: Optional[BloomFilter], items: List[str]) -> None:
+        generation = token_cache.bump_generation(GENERATION)
+        token_cache.get_cache().set(_announcement_key(generation), items, ANNOUNCEMENT_TIMEOUT)
+
+        with self._lock:
+            # The filter already holds the tokens announced by this bump, so it only becomes stale if it missed another,
+            # or if it was rebuilt since, possibly before they were committed.
+            if bloom is not None and self._filter is bloom and self._generation == generation - 1:
+                self._generation = generation
+
+    def rebuild(self) -> None:
+        from django_pat.models import PersonalAccessToken
+
+        # The generation is read first, so tokens created while loading make the new filter stale rather than missing.
+        generation = token_cache.get_generation(GENERATION)
+        tokens = PersonalAccessToken.objects.valid()
+
+        bloom = BloomFilter(int(tokens.count() * 1.25) + 1024, get_false_positive_rate())
+        for lookup_id, hashed_value in tokens.values_list("lookup_id", "hashed_value").iterator():
+            bloom.add(lookup_id if lookup_id is not None else hashed_value)
+
+        with self._lock:
+            self._filter = bloom
+            self._generation = generation
+            self._shared_generation = generation
+            self._built_at = time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._filter = None
+            self._generation = 0
+            self._shared_generation = 0
+            self._polled_at = 0.0
+            self._built_at = 0.0
+            self._next_rebuild = 0.0
+
+    def _usable_filter(self) -> Optional[BloomFilter]:
+        if self._filter is None or time.monotonic() - self._built_at > get_rebuild_interval():
+            self._schedule_rebuild()
+
+        return self._filter
+
+    def _should_poll(self) -> bool:
+        now = time.monotonic()
+        if now - self._polled_at < get_poll_interval():
+            return False
+
+        self._polled_at = now
+        return True
+
+    def _missed_keys(self, generation: int) -> List[str]:
+        # A counter behind the filter was evicted from the cache and started over, so announcements since are missed.
+        self._shared_generation = generation if generation >= self._generation else self._generation + 1
+
+        if not 0 < generation - self._generation <= ANNOUNCEMENT_REPLAY_LIMIT:
+            return []
+
+        return [_announcement_key(missed) for missed in range(self._generation + 1, generation + 1)]
+
+    def _replay(self, bloom: BloomFilter, generation: int, keys: List[str], entries: dict) -> None:
+        # Too far behind, or part of the log has expired, so only a rebuild can catch up.
+        if not keys or len(entries) < len(keys):
+            return
+
+        with self._lock:
+            # The filter was rebuilt or caught up by another thread meanwhile.
+            if self._filter is not bloom or self._generation != generation - len(keys):
+                return
+
+            for items in entries.values():
+                for item in items:
+                    bloom.add(item)
+
+            self._generation = generation
+
+    def _is_stale(self) -> bool:
+        if self._shared_generation <= self._generation:
+            return False
+
+        self._schedule_rebuild()
+        return True
+
+    def _schedule_rebuild(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._rebuilding or now < self._next_rebuild:
+                return
+            self._rebuilding = True
+            self._next_rebuild = now + REBUILD_SPACING
+
+        threading.Thread(target=self._run_rebuild, name="django-pat-prefilter", daemon=True).start()
+
+    def _run_rebuild(self) -> None:
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Unable to build the personal access token prefilter")
+        finally:
+            self._rebuilding = False
+            connections.close_all()
+
+
+token_prefilter = TokenPrefilter()
+
+
+@receiver(post_save, sender="django_pat.PersonalAccessToken")
+def token_created(sender, instance, created=False, using=None, **kwargs):
+    if created and prefilter_enabled():
+        token_prefilter.add(token_item(instance), using)
@@ -1,34 +1,56 @@
 from django.utils.translation import gettext
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import Throttled
 
+from django_pat import backoff
+from django_pat import instrumentation
 from django_pat.http import ParseException
-from django_pat.http import get_keyword
-from django_pat.http import parse_header
+from django_pat.http import get_parser
 from django_pat.models import PersonalAccessToken
 
 
 class PatAuthentication(BaseAuthentication):
     def authenticate(self, request):
+        # When the middleware is installed its trace is reused, otherwise this call is traced on its own.
+        with instrumentation.tracing() as trace:
+            try:
+                return self._authenticate(request, trace)
+            except AuthenticationFailed:
+                if backoff.backoff_enabled():
+                    backoff.record_failure(request)
+                raise
+
+    def _authenticate(self, request, trace: instrumentation.Trace):
         try:
-            token_value = parse_header(request)
+            with trace.stage(instrumentation.PARSE):
+                token_value = get_parser().parse(request)
         except ParseException as e:
+            trace.count(instrumentation.INVALID)
             raise AuthenticationFailed(e.msg)
 
         if token_value is None:
             return None
 
-        token = PersonalAccessToken.objects.first_valid_token(token_value)
+        # Clients that keep failing are turned away before their token costs a hash or a query.
+        if backoff.backoff_enabled() and backoff.is_blocked(request):
+            raise Throttled(wait=backoff.get_window(), detail=gettext("Too many failed authentication attempts."))
+
+        token = PersonalAccessToken.objects.get_for_authentication(token_value)
 
         if not token:
             raise AuthenticationFailed(gettext("Invalid token."))
 
-        if not token.user.is_active:
+        with trace.stage(instrumentation.USER_CHECK):
+            is_active = token.user.is_active
+
+        if not is_active:
             raise AuthenticationFailed(gettext("User inactive or deleted."))
 
-        token.mark_used()
+        with trace.stage(instrumentation.MARK_USED):
+            token.mark_used()
 
         return token.user, token
 
     def authenticate_header(self, request):
-        return get_keyword()
+        return get_parser().keyword
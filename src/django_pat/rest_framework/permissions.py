@@ -0,0 +1,29 @@
+from typing import Tuple
+
+from django.utils.translation import gettext_lazy
+from rest_framework.permissions import BasePermission
+
+from django_pat import scopes
+from django_pat.models import PersonalAccessToken
+
+
+class HasTokenScopes(BasePermission):
+    """
+    Allows requests made with a personal access token only if the token has every scope in `required_scopes` of the view.
+
+    The scopes of the token are loaded with it as a bitmask, so the check is a single bitwise AND with the mask of the
+    required scopes, which is computed once per set of scopes. Requests authenticated another way, and tokens created
+    without scopes, are allowed.
+    """
+
+    message = gettext_lazy("The token does not have the scopes required for this request.")
+
+    def has_permission(self, request, view) -> bool:
+        token = request.auth
+        if not isinstance(token, PersonalAccessToken):
+            return True
+
+        return token.has_scopes(scopes.get_mask(self.get_required_scopes(request, view)))
+
+    def get_required_scopes(self, request, view) -> Tuple[str, ...]:
+        return tuple(getattr(view, "required_scopes", ()))
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from rest_framework.throttling import SimpleRateThrottle
+
+from django_pat import cache as token_cache
+from django_pat.models import PersonalAccessToken
+
+
+class PersonalAccessTokenRateThrottle(SimpleRateThrottle):
+    """
+    Limits the rate of requests made with each personal access token, using a sliding window counter in the cache.
+
+    The default rate is set for the `personal_access_token` scope in `DEFAULT_THROTTLE_RATES`, and a token's own
+    `throttle_rate` overrides it. Requests authenticated without a token are not throttled.
+
+    Each request costs one atomic increment of the counter for the current window, and one read of the counter for the
+    previous window, which is weighted by how much of it still overlaps the sliding window.
+    """
+
+    scope = "personal_access_token"
+    cache_format = "django_pat:throttle:%(ident)s:%(duration)s:%(window)s"
+
+    def get_rate(self) -> Optional[str]:
+        # Unlike other throttles, a missing default only leaves tokens without their own rate unthrottled.
+        return self.THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view) -> Optional[str]:
+        if not isinstance(request.auth, PersonalAccessToken):
+            return None
+
+        return str(request.auth.pk)
+
+    def allow_request(self, request, view) -> bool:
+        ident = self.get_cache_key(request, view)
+        if ident is None:
+            return True
+
+        num_requests, duration = self.parse_rate(request.auth.throttle_rate or self.rate)
+        if num_requests is None or duration is None:
+            return True
+
+        now = self.timer()
+        window, offset = divmod(now, duration)
+        key = self.cache_format % {"ident": ident, "duration": duration, "window": int(window)}
+        previous_key = self.cache_format % {"ident": ident, "duration": duration, "window": int(window) - 1}
+
+        cache = token_cache.get_cache()
+        count = self._increment(cache, key, duration)
+        previous_weight = 1 - offset / duration
+        previous = cache.get(previous_key, 0)
+
+        if previous * previous_weight + count <= num_requests:
+            return True
+
+        self._wait = self._compute_wait(num_requests, duration, offset, count, previous)
+        return self.throttle_failure()
+
+    def wait(self) -> Optional[float]:
+        return self._wait
+
+    def _increment(self, cache, key: str, duration: int) -> int:
+        # Counters outlive their window by one more, so the next window can weigh them.
+        try:
+            return cache.incr(key)
+        except ValueError:
+            if cache.add(key, 1, duration * 2):
+                return 1
+
+            return cache.incr(key)
+
+    def _compute_wait(self, num_requests: int, duration: int, offset: float, count: int, previous: int) -> float:
+        if count < num_requests:
+            # The weight of the previous window shrinks over this one, until it leaves room for another request.
+            return max(duration * (1 - (num_requests - count - 1) / previous) - offset, 0)
+
+        # This window is full, so there is only room once the next window has weighed down this one's count.
+        return duration - offset + duration * max(1 - (num_requests - 1) / count, 0)
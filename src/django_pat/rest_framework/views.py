@@ -1,25 +1,171 @@
+from typing import List
+from typing import Optional
 from typing import Union
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext
+from django.utils.translation import gettext_lazy
 from rest_framework import serializers
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 
+from django_pat import conditional
+from django_pat import scopes
 from django_pat.models import PersonalAccessToken
+from django_pat.models import TokenEntry
 
 UserFieldType = Union[serializers.PrimaryKeyRelatedField, AbstractUser]
 
 
+def get_bulk_create_limit() -> int:
+    return getattr(settings, "PAT_API_BULK_CREATE_LIMIT", 1000)
+
+
+def get_bulk_revoke_limit() -> int:
+    return getattr(settings, "PAT_API_BULK_REVOKE_LIMIT", 1000)
+
+
+def get_page_size() -> Optional[int]:
+    return getattr(settings, "PAT_API_PAGE_SIZE", None)
+
+
+class PersonalAccessTokenCursorPagination(CursorPagination):
+    """
+    Pages through tokens newest first, continuing from the created_at of the last token of the previous page, so pages
+    are range scans of the (user, created_at, id) index rather than offsets.
+    """
+
+    ordering = ("-created_at", "-id")
+
+    def get_page_size(self, request):
+        return get_page_size()
+
+
+class ScopesField(serializers.Field):
+    """
+    Represents the scope mask of a token as the list of its scope names, or null for a token with full access.
+    """
+
+    default_error_messages = {
+        "not_a_list": gettext_lazy('Expected a list of scopes but got type "{input_type}".'),
+        "invalid_scope": gettext_lazy('"{input}" is not a valid scope.'),
+    }
+
+    def to_internal_value(self, data) -> List[str]:
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+
+        names = list(data)
+        for name in names:
+            if name not in scopes.get_scopes():
+                self.fail("invalid_scope", input=name)
+
+        return names
+
+    def to_representation(self, value: int) -> List[str]:
+        return scopes.to_names(value)
+
+
 class CreatePersonalAccessTokenSerializer(serializers.ModelSerializer):
     user: UserFieldType = serializers.PrimaryKeyRelatedField(read_only=True, default=serializers.CurrentUserDefault())
     plain_text = serializers.CharField(read_only=True)
     revoked_at = serializers.DateTimeField(read_only=True)
     last_used_at = serializers.DateTimeField(read_only=True)
+    expires_at = serializers.DateTimeField(required=False, allow_null=True)
+    scopes = ScopesField(required=False, allow_null=True)
+    total_requests = serializers.SerializerMethodField()
 
     class Meta:
         model = PersonalAccessToken
-        fields = ["id", "name", "description", "user", "plain_text", "revoked_at", "last_used_at"]
-        readonly = ["id", "user", "plain_text", "revoked_at", "last_used_at"]
+        fields = [
+            "id",
+            "name",
+            "description",
+            "user",
+            "plain_text",
+            "revoked_at",
+            "expires_at",
+            "scopes",
+            "last_used_at",
+            "total_requests",
+        ]
+        readonly = ["id", "user", "plain_text", "revoked_at", "last_used_at", "total_requests"]
+
+    def get_total_requests(self, obj: PersonalAccessToken) -> int:
+        # Tokens from the viewset queryset are annotated with their usage, new tokens have none yet.
+        return getattr(obj, "total_requests", None) or 0
+
+    def validate_expires_at(self, value):
+        if value is not None and value <= timezone.now():
+            raise serializers.ValidationError(gettext("Expiry must be in the future."))
+
+        return value
+
+
+class PersonalAccessTokenReadSerializer(serializers.BaseSerializer):
+    """
+    Serializes tokens for reading, with the same output as CreatePersonalAccessTokenSerializer, from `.values()` rows of
+    `source_fields`, annotated with their `total_requests`, rather than token instances.
+
+    No fields are bound for each token, so a list costs one dictionary per row instead of a model instance and a pass
+    through the field machinery of a ModelSerializer.
+    """
+
+    source_fields = (
+        "id",
+        "name",
+        "description",
+        "user",
+        "created_at",
+        "revoked_at",
+        "expires_at",
+        "scopes",
+        "last_used_at",
+    )
+
+    _datetime = serializers.DateTimeField(read_only=True)
+
+    def to_representation(self, row: dict) -> dict:
+        datetime_representation = self._datetime.to_representation
+
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "description": row["description"],
+            "user": row["user"],
+            "revoked_at": datetime_representation(row["revoked_at"]),
+            "expires_at": datetime_representation(row["expires_at"]),
+            "scopes": scopes.to_names(row["scopes"]) if row["scopes"] is not None else None,
+            "last_used_at": datetime_representation(row["last_used_at"]),
+            "total_requests": row["total_requests"] or 0,
+        }
+
+
+class RevokePersonalAccessTokensSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    all = serializers.BooleanField(required=False, default=False)
+
+    def validate_ids(self, value):
+        if len(value) > get_bulk_revoke_limit():
+            raise serializers.ValidationError(gettext("Too many tokens to revoke at once."))
+
+        return value
+
+    def validate(self, attrs):
+        # Revoking every token must be asked for explicitly, so a request without ids never revokes them all.
+        if attrs["all"] == ("ids" in attrs):
+            raise serializers.ValidationError(gettext("Either list the ids of the tokens to revoke or set all."))
+
+        return attrs
 
 
 class PersonalAccessTokenViewSet(ModelViewSet):
@@ -28,14 +174,110 @@ class PersonalAccessTokenViewSet(ModelViewSet):
     queryset = PersonalAccessToken.objects.all()
     serializer_class = CreatePersonalAccessTokenSerializer
 
+    @property
+    def pagination_class(self):  # type: ignore[override]
+        # Cursor pagination changes the shape of list responses, so it is only used once a page size is configured.
+        if get_page_size():
+            return PersonalAccessTokenCursorPagination
+
+        return api_settings.DEFAULT_PAGINATION_CLASS
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the tokens of the current user, answering with a 304 when the client already has the current list.
+
+        Responses carry an ETag from the version of the user's tokens, so polling unchanged tokens costs one aggregate
+        query. The ETag also differs between renderers.
+        """
+        etag = conditional.get_list_etag(request.user, request.accepted_renderer.format)
+
+        response = conditional.not_modified(request, etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        return conditional.set_etag(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        # The token is resolved first, so unknown tokens and those of other users are still not found. Its ETag comes
+        # from the row that is serialized, so a 304 costs the same single query.
+        instance = self.get_object()
+        etag = conditional.get_row_etag(instance, request.accepted_renderer.format)
+
+        response = conditional.not_modified(request, etag)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+
+        return conditional.set_etag(response, etag)
+
     def get_queryset(self):
-        return super().get_queryset().filter(user=self.request.user)
+        queryset = super().get_queryset().filter(user=self.request.user)
+
+        if self.reads_rows():
+            # Only the serialized columns are loaded, leaving out the hash and other columns only authentication needs.
+            queryset = queryset.values(*PersonalAccessTokenReadSerializer.source_fields)
+
+        # Only responses listing tokens show their total requests, so revoking them does not sum their usage.
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.with_total_requests()
+
+        return queryset
+
+    def get_serializer_class(self):
+        if self.reads_rows():
+            return PersonalAccessTokenReadSerializer
+
+        return super().get_serializer_class()
+
+    def reads_rows(self) -> bool:
+        """
+        Return whether tokens are only read, so they are loaded as rows for PersonalAccessTokenReadSerializer.
+
+        The browsable API builds its forms through the list action with the method of the form, so those keep the
+        serializer for creating tokens.
+        """
+        return self.action in ("list", "retrieve") and self.request.method in SAFE_METHODS
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data, many=True, max_length=get_bulk_create_limit())
+        serializer.is_valid(raise_exception=True)
+        self.perform_bulk_create(serializer)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_bulk_create(self, serializer: serializers.ListSerializer):
+        names = [item.get("name") for item in serializer.validated_data]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError(gettext("Token names must be unique."))
+
+        entries = (
+            TokenEntry(
+                self.request.user,
+                item.get("name"),
+                item.get("description", ""),
+                expires_at=item.get("expires_at"),
+                scopes=item.get("scopes"),
+            )
+            for item in serializer.validated_data
+        )
+
+        tokens = []
+        with transaction.atomic():
+            for token, plain_text in PersonalAccessToken.objects.bulk_create_tokens(entries):
+                token.plain_text = plain_text  # type: ignore
+                tokens.append(token)
+
+        serializer.instance = tokens  # type: ignore
 
     def perform_create(self, serializer: CreatePersonalAccessTokenSerializer):  # type: ignore[override]
         token, plain_text = PersonalAccessToken.objects.create_token(  # type: ignore
             self.request.user,
             serializer.validated_data.get("name"),
             serializer.validated_data.get("description", ""),
+            expires_at=serializer.validated_data.get("expires_at"),
+            scopes=serializer.validated_data.get("scopes"),
         )
 
         # TODO Explore a better way to handle typing here.
@@ -45,3 +287,16 @@ class PersonalAccessTokenViewSet(ModelViewSet):
 
     def perform_destroy(self, instance: PersonalAccessToken):
         instance.revoke()
+
+    @action(detail=False, methods=["post"], serializer_class=RevokePersonalAccessTokensSerializer)
+    def revoke(self, request, *args, **kwargs):
+        """
+        Revoke the listed tokens of the current user, or all of them when all is set.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if serializer.validated_data["all"]:
+            return Response({"revoked": PersonalAccessToken.objects.revoke_all_for_user(request.user)})
+
+        return Response({"revoked": self.get_queryset().filter(pk__in=serializer.validated_data["ids"]).revoke()})
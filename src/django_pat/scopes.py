@@ -0,0 +1,91 @@
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# Scope masks are stored in a positive 64 bit integer column.
+MAX_BIT = 62
+
+
+def _load_scopes() -> Dict[str, int]:
+    masks = {}
+    bits = set()
+
+    for name, bit in getattr(settings, "PAT_SCOPES", {}).items():
+        if not isinstance(bit, int) or not 0 <= bit <= MAX_BIT:
+            raise ValueError(f"The bit of scope '{name}' in PAT_SCOPES must be between 0 and {MAX_BIT}")
+        if bit in bits:
+            raise ValueError(f"The bit of scope '{name}' in PAT_SCOPES is used by another scope")
+
+        bits.add(bit)
+        masks[name] = 1 << bit
+
+    return masks
+
+
+_scopes: Optional[Dict[str, int]] = None
+_masks: Dict[Tuple[str, ...], int] = {}
+
+
+def get_scopes() -> Dict[str, int]:
+    """
+    Return the mask of each scope in PAT_SCOPES, which maps every scope name to the bit it is stored in.
+    """
+    global _scopes
+
+    if _scopes is None:
+        _scopes = _load_scopes()
+
+    return _scopes
+
+
+@receiver(setting_changed)
+def reset_scopes(*, setting, **kwargs):
+    global _scopes
+
+    if setting == "PAT_SCOPES":
+        _scopes = None
+        _masks.clear()
+
+
+def get_choices() -> List[Tuple[str, str]]:
+    return [(name, name) for name in get_scopes()]
+
+
+def to_mask(names: Iterable[str]) -> int:
+    """
+    Return the mask of the named scopes, or raise ValueError for a scope missing from PAT_SCOPES.
+    """
+    scopes = get_scopes()
+    mask = 0
+
+    for name in names:
+        try:
+            mask |= scopes[name]
+        except KeyError:
+            raise ValueError(f"Unknown scope '{name}'")
+
+    return mask
+
+
+def get_mask(names: Tuple[str, ...]) -> int:
+    """
+    Return the mask of the named scopes like to_mask, remembering it for the next check of the same scopes.
+    """
+    try:
+        return _masks[names]
+    except KeyError:
+        mask = _masks[names] = to_mask(names)
+        return mask
+
+
+def to_names(mask: int) -> List[str]:
+    """
+    Return the names of the scopes in a mask, in the order of PAT_SCOPES. Bits of scopes since removed are left out.
+    """
+    return [name for name, scope in get_scopes().items() if mask & scope]
@@ -1,19 +1,58 @@
+from typing import Optional
+
 from django import forms
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Q
+from django.http import Http404
 from django.http import HttpRequest
 from django.http import HttpResponse
 from django.http import HttpResponseRedirect
 from django.urls import reverse_lazy
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
+from django.utils.http import urlsafe_base64_encode
 from django.views.generic import DeleteView
 from django.views.generic import FormView
 from django.views.generic import ListView
 
+from django_pat import conditional
+from django_pat import scopes
 from django_pat.models import PersonalAccessToken
 
+# The columns shown in token lists, leaving out the hash and other columns only authentication needs.
+LIST_FIELDS = ["id", "name", "description", "created_at", "revoked_at", "expires_at", "scopes", "last_used_at"]
+
+
+def encode_cursor(token: PersonalAccessToken) -> str:
+    return urlsafe_base64_encode(f"{token.created_at.isoformat()}|{token.pk}".encode())
+
+
+def filter_after_cursor(queryset, cursor: str):
+    """
+    Return the tokens that come after the cursor in the (created_at, id) descending order, or raise Http404.
+    """
+    try:
+        raw_created_at, raw_pk = force_str(urlsafe_base64_decode(cursor)).split("|")
+        created_at, pk = parse_datetime(raw_created_at), int(raw_pk)
+    except (ValueError, UnicodeDecodeError):
+        raise Http404("Invalid cursor")
+
+    if created_at is None:
+        raise Http404("Invalid cursor")
+
+    return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
 
 class CreateTokenForm(forms.Form):
     name = forms.CharField(max_length=255)
     description = forms.CharField(required=False)
+    scopes = forms.MultipleChoiceField(
+        choices=scopes.get_choices,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+        help_text="Leave empty for a token with full access.",
+    )
 
 
 class CreateTokenView(LoginRequiredMixin, FormView):
@@ -25,7 +64,9 @@ class CreateTokenView(LoginRequiredMixin, FormView):
         description = form.cleaned_data["description"]
 
         try:
-            token, plaintext = PersonalAccessToken.objects.create_token(self.request.user, name, description)
+            token, plaintext = PersonalAccessToken.objects.create_token(
+                self.request.user, name, description, scopes=form.cleaned_data["scopes"]
+            )
         except Exception:
             return self.form_invalid(form)
 
@@ -33,12 +74,54 @@ class CreateTokenView(LoginRequiredMixin, FormView):
 
 
 class ListTokensView(LoginRequiredMixin, ListView):
+    """
+    Lists the tokens of the current user, newest first.
+
+    Pages continue after the (created_at, id) of the last token shown rather than at an offset, so every page is a
+    single range scan of the (user, created_at, id) index, however deep it is, and no count is needed.
+
+    Responses carry an ETag from the version of the user's tokens, so polling an unchanged list costs one aggregate
+    query and a 304 response.
+    """
+
     template_name = "personal_access_token/list.html"
     model = PersonalAccessToken
     paginate_by = 20
+    next_cursor: Optional[str] = None
+
+    def get(self, request, *args, **kwargs):
+        etag = conditional.get_list_etag(request.user)
+
+        response = conditional.not_modified(request, etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        return conditional.set_etag(response, etag)
 
     def get_queryset(self):
-        return super().get_queryset().filter(user=self.request.user)
+        return super().get_queryset().filter(user=self.request.user).only(*LIST_FIELDS).order_by("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get("after")
+        if cursor:
+            queryset = filter_after_cursor(queryset, cursor)
+
+        # One more token than fits on the page is loaded, to find out whether there is a next page.
+        tokens = list(queryset[: page_size + 1])
+        has_next = len(tokens) > page_size
+        tokens = tokens[:page_size]
+
+        if has_next:
+            self.next_cursor = encode_cursor(tokens[-1])
+
+        return None, None, tokens, has_next
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["next_cursor"] = self.next_cursor
+        context["is_first_page"] = not self.request.GET.get("after")
+
+        return context
 
 
 class DeleteTokenView(LoginRequiredMixin, DeleteView):
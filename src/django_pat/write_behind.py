@@ -0,0 +1,230 @@
+import atexit
+import logging
+import threading
+from datetime import date
+from datetime import datetime
+from typing import Dict
+from typing import Generic
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def write_behind_enabled() -> bool:
+    return getattr(settings, "PAT_LAST_USED_WRITE_BEHIND", False)
+
+
+def get_flush_interval() -> float:
+    return getattr(settings, "PAT_LAST_USED_FLUSH_INTERVAL", 10)
+
+
+def get_batch_size() -> Optional[int]:
+    return getattr(settings, "PAT_LAST_USED_BATCH_SIZE", 500)
+
+
+def usage_tracking_enabled() -> bool:
+    return getattr(settings, "PAT_USAGE_TRACKING_ENABLED", False)
+
+
+class Buffer(Generic[T]):
+    """
+    Collects pending token writes in memory, keyed by token id, and writes them to the database in bulk.
+
+    Writes are flushed by a daemon thread started on first use and once more when the process exits.
+    """
+
+    name = "django-pat-write-behind"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, T] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def pending(self) -> Dict[int, T]:
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        try:
+            self._write(pending)
+        except Exception:
+            logger.exception("Unable to flush %s", self.name)
+            self._requeue(pending)
+            return 0
+
+        return len(pending)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending = {}
+
+    def _put(self, token_id: int, item: T) -> None:
+        with self._lock:
+            current = self._pending.get(token_id)
+            if current is None or self._replaces(item, current):
+                self._pending[token_id] = item
+
+            if self._thread is None:
+                self._start()
+
+    def _replaces(self, item: T, current: T) -> bool:
+        return True
+
+    def _write(self, pending: Dict[int, T]) -> None:
+        raise NotImplementedError
+
+    def _requeue(self, pending: Dict[int, T]) -> None:
+        with self._lock:
+            for token_id, item in pending.items():
+                current = self._pending.get(token_id)
+                if current is None or self._replaces(item, current):
+                    self._pending[token_id] = item
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(get_flush_interval()):
+            try:
+                self.flush()
+            finally:
+                # Connections are thread local, so close the ones opened by this thread between flushes.
+                connections.close_all()
+
+
+class LastUsedBuffer(Buffer[datetime]):
+    """
+    Buffers last used times, so a token used many times between flushes costs a single row in the next update.
+    """
+
+    name = "django-pat-last-used"
+
+    def add(self, token_id: int, used_at: datetime) -> None:
+        self._put(token_id, used_at)
+
+    def _replaces(self, item: datetime, current: datetime) -> bool:
+        return current < item
+
+    def _write(self, pending: Dict[int, datetime]) -> None:
+        from django_pat.models import PersonalAccessToken
+
+        items = list(pending.items())
+        batch_size = get_batch_size() or len(items)
+
+        for start in range(0, len(items), batch_size):
+            batch = items[start : start + batch_size]
+
+            # Times are only moved forward, so a flush from another process with older times does not overwrite a
+            # later use already written.
+            PersonalAccessToken.objects.filter(pk__in=[token_id for token_id, _ in batch]).update(
+                last_used_at=Case(
+                    *(
+                        When(Q(pk=token_id) & (Q(last_used_at__isnull=True) | Q(last_used_at__lt=used_at)), then=Value(used_at))
+                        for token_id, used_at in batch
+                    ),
+                    default=F("last_used_at"),
+                )
+            )
+
+
+class RehashBuffer(Buffer[Tuple[str, str, str]]):
+    """
+    Buffers tokens to be rehashed with the current secret, after they have been used with an old one.
+    """
+
+    name = "django-pat-rehash"
+
+    def add(self, token_id: int, old_key_id: str, hashed_value: str, key_id: str) -> None:
+        self._put(token_id, (old_key_id, hashed_value, key_id))
+
+    def _write(self, pending: Dict[int, Tuple[str, str, str]]) -> None:
+        from django_pat.models import PersonalAccessToken
+
+        for token_id, (old_key_id, hashed_value, key_id) in pending.items():
+            # Only the hash columns are written, and only if another process has not already rehashed the token.
+            PersonalAccessToken.objects.filter(pk=token_id, key_id=old_key_id).update(
+                hashed_value=hashed_value,
+                key_id=key_id,
+            )
+
+
+class UsageBuffer(Buffer[Dict[date, int]]):
+    """
+    Buffers the number of requests made with each token per day, so requests only cost a counter increment in memory.
+    """
+
+    name = "django-pat-usage"
+
+    def add(self, token_id: int, day: date, count: int = 1) -> None:
+        with self._lock:
+            self._add(token_id, {day: count})
+
+            if self._thread is None:
+                self._start()
+
+    def _add(self, token_id: int, counts: Dict[date, int]) -> None:
+        days = self._pending.setdefault(token_id, {})
+        for day, count in counts.items():
+            days[day] = days.get(day, 0) + count
+
+    def _requeue(self, pending: Dict[int, Dict[date, int]]) -> None:
+        with self._lock:
+            for token_id, counts in pending.items():
+                self._add(token_id, counts)
+
+    def _write(self, pending: Dict[int, Dict[date, int]]) -> None:
+        from django_pat.models import PersonalAccessToken
+        from django_pat.models import PersonalAccessTokenUsage
+
+        # Tokens deleted since they were used are dropped, since their rows could never be inserted.
+        existing = set(PersonalAccessToken.objects.filter(pk__in=list(pending)).values_list("pk", flat=True))
+
+        by_day: Dict[date, Dict[int, int]] = {}
+        for token_id, counts in pending.items():
+            if token_id in existing:
+                for day, count in counts.items():
+                    by_day.setdefault(day, {})[token_id] = count
+
+        batch_size = get_batch_size() or len(existing) or 1
+
+        for day, day_counts in by_day.items():
+            items = list(day_counts.items())
+
+            for start in range(0, len(items), batch_size):
+                batch = items[start : start + batch_size]
+
+                # Missing buckets are created empty, then every bucket is incremented in place by a single update, so
+                # concurrent flushes from other processes add up rather than overwrite each other.
+                PersonalAccessTokenUsage.objects.bulk_create(
+                    [PersonalAccessTokenUsage(token_id=token_id, date=day, count=0) for token_id, _ in batch],
+                    ignore_conflicts=True,
+                )
+                PersonalAccessTokenUsage.objects.filter(date=day, token_id__in=[token_id for token_id, _ in batch]).update(
+                    count=F("count") + Case(*(When(token_id=token_id, then=Value(count)) for token_id, count in batch))
+                )
+
+
+last_used = LastUsedBuffer()
+rehash = RehashBuffer()
+usage = UsageBuffer()
@@ -24,6 +24,28 @@ class TestPatAuthentication(TestCase):
         self.assertEqual(self.user, found_user)
         self.assertEqual(self.token, found_token)
 
+    def test_it_resolves_the_token_and_user_in_one_query(self):
+        obj = PatAuthentication()
+
+        # One query to resolve the token and its user, and one to record the token as used.
+        with self.assertNumQueries(2):
+            req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+            found_user, found_token = obj.authenticate(req)
+            self.assertEqual("testuser", found_user.username)
+
+        # Within the last used granularity the token is not written again.
+        with self.assertNumQueries(1):
+            req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+            found_user, found_token = obj.authenticate(req)
+            self.assertEqual("testuser", found_user.username)
+
+    def test_it_fails_with_a_single_query_when_matching_token_not_found(self):
+        req = self.request_factory.get("path", HTTP_AUTHORIZATION="Access-Token not-a-token")
+        obj = PatAuthentication()
+
+        with self.assertNumQueries(1):
+            self.assertRaises(AuthenticationFailed, obj.authenticate, req)
+
     def test_it_fails_when_matching_token_not_found(self):
         req = self.request_factory.get("path", HTTP_AUTHORIZATION="Access-Token not-a-token")
         obj = PatAuthentication()
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import override_settings
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.views import APIView
+
+from django_pat import cache as token_cache
+from django_pat.models import PersonalAccessToken
+from django_pat.rest_framework.auth import PatAuthentication
+from django_pat.rest_framework.permissions import HasTokenScopes
+
+User = get_user_model()
+
+
+class ScopedView(APIView):
+    authentication_classes = [PatAuthentication, SessionAuthentication]
+    permission_classes = [HasTokenScopes]
+    required_scopes = ["read", "write"]
+
+    def get(self, request):
+        return Response()
+
+
+@override_settings(PAT_SCOPES={"read": 0, "write": 1, "admin": 5})
+class TestHasTokenScopes(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+
+    def get(self, token_val):
+        return ScopedView.as_view()(self.factory.get("/", HTTP_AUTHORIZATION=f"Access-Token {token_val}"))
+
+    def test_it_allows_tokens_with_the_required_scopes(self):
+        token, token_val = PersonalAccessToken.objects.create_token(self.user, "name", scopes=["read", "write", "admin"])
+
+        self.assertEqual(200, self.get(token_val).status_code)
+
+    def test_it_rejects_tokens_missing_a_required_scope(self):
+        token, token_val = PersonalAccessToken.objects.create_token(self.user, "name", scopes=["read", "admin"])
+
+        self.assertEqual(403, self.get(token_val).status_code)
+
+    def test_it_allows_tokens_without_scopes(self):
+        token, token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+        self.assertEqual(200, self.get(token_val).status_code)
+
+    def test_it_allows_requests_authenticated_otherwise(self):
+        request = self.factory.get("/")
+        force_authenticate(request, user=self.user)
+
+        self.assertEqual(200, ScopedView.as_view()(request).status_code)
+
+    @override_settings(PAT_CACHE_ENABLED=True)
+    def test_it_checks_scopes_of_cached_tokens_without_queries(self):
+        token_cache.get_cache().clear()
+        token, token_val = PersonalAccessToken.objects.create_token(self.user, "name", scopes=["read"])
+        self.get(token_val)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(token_val)
+
+        self.assertEqual(403, response.status_code)
+        self.assertFalse(any("django_pat_personalaccesstoken" in query["sql"] for query in queries))
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.test.utils import override_settings
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from django_pat import cache as token_cache
+from django_pat.models import PersonalAccessToken
+from django_pat.rest_framework.auth import PatAuthentication
+from django_pat.rest_framework.throttling import PersonalAccessTokenRateThrottle
+
+User = get_user_model()
+
+
+class ThrottledView(APIView):
+    authentication_classes = [PatAuthentication]
+    throttle_classes = [PersonalAccessTokenRateThrottle]
+
+    def get(self, request):
+        return Response()
+
+
+class TestPersonalAccessTokenRateThrottle(TestCase):
+    def setUp(self):
+        token_cache.get_cache().clear()
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, self.token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+        rates = mock.patch.object(PersonalAccessTokenRateThrottle, "THROTTLE_RATES", {"personal_access_token": "3/min"})
+        rates.start()
+        self.addCleanup(rates.stop)
+
+        self.now = 6000.0
+        timer = mock.patch.object(PersonalAccessTokenRateThrottle, "timer", lambda throttle: self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def get(self, token_val=None):
+        headers = {"HTTP_AUTHORIZATION": f"Access-Token {token_val}"} if token_val else {}
+        return ThrottledView.as_view()(self.factory.get("/", **headers))
+
+    def status_codes(self, count, token_val=None):
+        return [self.get(token_val or self.token_val).status_code for _ in range(count)]
+
+    def test_it_limits_requests_per_token(self):
+        self.assertEqual([200, 200, 200, 429], self.status_codes(4))
+
+        other, other_val = PersonalAccessToken.objects.create_token(self.user, "other")
+        self.assertEqual([200], self.status_codes(1, other_val))
+
+    def test_it_reports_when_to_retry(self):
+        self.status_codes(3)
+        self.now += 15
+
+        response = self.get(self.token_val)
+
+        self.assertEqual(429, response.status_code)
+        self.assertEqual("75", response["Retry-After"])
+
+    def test_it_weighs_the_previous_window(self):
+        self.status_codes(3)
+        self.now += 90
+
+        # Half of the previous window overlaps the sliding window, so it counts as 1.5 requests.
+        self.assertEqual([200, 429], self.status_codes(2))
+
+        # Rejected requests count too, so the two made above fill the previous window of the next one.
+        self.now += 30
+        self.assertEqual([200, 429], self.status_codes(2))
+
+    def test_tokens_can_override_the_default_rate(self):
+        PersonalAccessToken.objects.filter(pk=self.token.pk).set_throttle_rate("5/min")
+
+        self.assertEqual([200] * 5 + [429], self.status_codes(6))
+
+    def test_it_does_not_throttle_requests_without_a_token(self):
+        self.assertEqual([200] * 4, [self.get().status_code for _ in range(4)])
+
+    def test_it_does_not_throttle_without_a_rate(self):
+        with mock.patch.object(PersonalAccessTokenRateThrottle, "THROTTLE_RATES", {}):
+            self.assertEqual([200] * 4, self.status_codes(4))
+
+    @override_settings(PAT_CACHE_ENABLED=True, PAT_CACHE_USERS=True)
+    def test_it_reads_the_rate_of_cached_tokens_without_a_query(self):
+        PersonalAccessToken.objects.filter(pk=self.token.pk).set_throttle_rate("5/min")
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        with self.assertNumQueries(0):
+            token = PersonalAccessToken.objects.get_for_authentication(self.token_val)
+            self.assertEqual("5/min", token.throttle_rate)
+
+    @override_settings(PAT_CACHE_ENABLED=True)
+    def test_setting_a_rate_invalidates_cached_tokens(self):
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        PersonalAccessToken.objects.filter(user=self.user).set_throttle_rate("1/min")
+
+        self.assertEqual("1/min", PersonalAccessToken.objects.get_for_authentication(self.token_val).throttle_rate)
+
+    def test_it_rejects_invalid_rates(self):
+        with self.assertRaises(ValidationError):
+            PersonalAccessToken.objects.filter(pk=self.token.pk).set_throttle_rate("lots")
@@ -1,9 +1,18 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
 
 from django_pat.models import PersonalAccessToken
+from django_pat.models import PersonalAccessTokenUsage
+from django_pat.rest_framework.views import CreatePersonalAccessTokenSerializer
 
 User = get_user_model()
 
@@ -52,3 +61,229 @@ class TestPersonalAccessTokenViewSet(TestCase):
 
         token.refresh_from_db()
         self.assertIsNotNone(token.revoked_at)
+
+    def test_creates_many_tokens_for_the_current_user(self):
+        url = reverse("personalaccesstoken-list")
+        response = self.client.post(
+            url,
+            data=[{"name": "Token 1"}, {"name": "Token 2", "description": "Second"}],
+            format="json",
+        )
+
+        self.assertEqual(201, response.status_code)
+        j = response.json()
+        self.assertEqual(["Token 1", "Token 2"], [item["name"] for item in j])
+        for item in j:
+            self.assertEqual(self.user.id, item["user"])
+            token = PersonalAccessToken.objects.get(pk=item["id"])
+            self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(item["plain_text"]))
+
+    def test_bulk_create_validates_unique_names(self):
+        PersonalAccessToken.objects.create_token(self.user, "Existing Token")
+        url = reverse("personalaccesstoken-list")
+
+        response = self.client.post(url, data=[{"name": "New Token"}, {"name": "Existing Token"}], format="json")
+        self.assertEqual(400, response.status_code)
+
+        response = self.client.post(url, data=[{"name": "New Token"}, {"name": "New Token"}], format="json")
+        self.assertEqual(400, response.status_code)
+
+        self.assertEqual(1, PersonalAccessToken.objects.filter(user=self.user).count())
+
+    @override_settings(PAT_API_BULK_CREATE_LIMIT=1)
+    def test_bulk_create_limits_the_number_of_tokens(self):
+        url = reverse("personalaccesstoken-list")
+        response = self.client.post(url, data=[{"name": "Token 1"}, {"name": "Token 2"}], format="json")
+
+        self.assertEqual(400, response.status_code)
+
+    def test_revoke_revokes_all_of_the_current_users_tokens(self):
+        PersonalAccessToken.objects.create_token(self.user, "Token 1")
+        PersonalAccessToken.objects.create_token(self.user, "Token 2")
+        other_user = User.objects.create_user("otheruser", "test@test.com", "random-insecure-text")
+        other_token, _ = PersonalAccessToken.objects.create_token(other_user, "Other Token")
+
+        response = self.client.post(reverse("personalaccesstoken-revoke"), data={"all": True}, format="json")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({"revoked": 2}, response.json())
+        self.assertFalse(PersonalAccessToken.objects.filter(user=self.user).valid().exists())
+        self.assertTrue(PersonalAccessToken.objects.filter(pk=other_token.pk).valid().exists())
+
+    def test_revoke_requires_either_ids_or_all(self):
+        PersonalAccessToken.objects.create_token(self.user, "Token")
+        url = reverse("personalaccesstoken-revoke")
+
+        for data in [{}, {"id": [1]}, {"all": False}, {"ids": [1], "all": True}]:
+            with self.subTest(data=data):
+                self.assertEqual(400, self.client.post(url, data=data, format="json").status_code)
+
+        self.assertTrue(PersonalAccessToken.objects.filter(user=self.user).valid().exists())
+
+    @override_settings(PAT_API_BULK_REVOKE_LIMIT=1)
+    def test_revoke_limits_the_number_of_ids(self):
+        response = self.client.post(reverse("personalaccesstoken-revoke"), data={"ids": [1, 2]}, format="json")
+
+        self.assertEqual(400, response.status_code)
+
+    def test_revoke_does_not_sum_the_usage_of_tokens(self):
+        token, _ = PersonalAccessToken.objects.create_token(self.user, "Token")
+        PersonalAccessTokenUsage.objects.create(token=token, date=timezone.now().date(), count=3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("personalaccesstoken-revoke"), data={"all": True}, format="json")
+
+        self.assertEqual({"revoked": 1}, response.json())
+        self.assertFalse(any(PersonalAccessTokenUsage._meta.db_table in query["sql"] for query in queries))
+
+    def test_revoke_revokes_the_listed_tokens(self):
+        token, _ = PersonalAccessToken.objects.create_token(self.user, "Token 1")
+        kept_token, _ = PersonalAccessToken.objects.create_token(self.user, "Token 2")
+        other_user = User.objects.create_user("otheruser", "test@test.com", "random-insecure-text")
+        other_token, _ = PersonalAccessToken.objects.create_token(other_user, "Other Token")
+
+        response = self.client.post(
+            reverse("personalaccesstoken-revoke"), data={"ids": [token.pk, other_token.pk]}, format="json"
+        )
+
+        self.assertEqual({"revoked": 1}, response.json())
+        self.assertEqual(
+            [kept_token.pk], list(PersonalAccessToken.objects.valid().filter(user=self.user).values_list("pk", flat=True))
+        )
+        self.assertTrue(PersonalAccessToken.objects.filter(pk=other_token.pk).valid().exists())
+
+    def test_creates_a_token_with_an_expiry(self):
+        expires_at = timezone.now() + timedelta(days=30)
+        response = self.client.post(
+            reverse("personalaccesstoken-list"), data={"name": "Expiring", "expires_at": expires_at.isoformat()}
+        )
+
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(expires_at, PersonalAccessToken.objects.get(pk=response.json()["id"]).expires_at)
+
+    def test_post_rejects_an_expiry_in_the_past(self):
+        expires_at = timezone.now() - timedelta(days=1)
+        response = self.client.post(
+            reverse("personalaccesstoken-list"), data={"name": "Expired", "expires_at": expires_at.isoformat()}
+        )
+
+        self.assertEqual(400, response.status_code)
+
+    def test_list_includes_the_total_requests_of_tokens(self):
+        token, _ = PersonalAccessToken.objects.create_token(self.user, "Token")
+        PersonalAccessTokenUsage.objects.create(token=token, date=timezone.now().date(), count=3)
+        PersonalAccessTokenUsage.objects.create(token=token, date=timezone.now().date() - timedelta(days=1), count=2)
+
+        response = self.client.get(reverse("personalaccesstoken-list"))
+
+        self.assertEqual([5], [item["total_requests"] for item in response.json()])
+
+    @override_settings(PAT_API_PAGE_SIZE=2)
+    def test_list_pages_through_tokens_with_a_cursor(self):
+        for i in range(5):
+            PersonalAccessToken.objects.create_token(self.user, f"Token {i}")
+
+        names = []
+        url = reverse("personalaccesstoken-list")
+        while url:
+            j = self.client.get(url).json()
+            names.extend(item["name"] for item in j["results"])
+            url = j["next"]
+
+        self.assertEqual([f"Token {i}" for i in reversed(range(5))], names)
+
+    def test_list_does_not_load_hashes(self):
+        PersonalAccessToken.objects.create_token(self.user, "Token")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("personalaccesstoken-list"))
+
+        self.assertFalse(any("hashed_value" in query["sql"] for query in queries))
+
+    def test_reads_match_the_token_serializer(self):
+        token, _ = PersonalAccessToken.objects.create_token(
+            self.user, "Token", "Described", expires_at=timezone.now() + timedelta(days=1)
+        )
+        PersonalAccessToken.objects.filter(pk=token.pk).update(last_used_at=timezone.now())
+        PersonalAccessTokenUsage.objects.create(token=token, date=timezone.now().date(), count=3)
+        revoked_token, _ = PersonalAccessToken.objects.create_token(self.user, "Revoked Token")
+        revoked_token.revoke()
+
+        tokens = PersonalAccessToken.objects.filter(user=self.user).annotate(total_requests=Sum("usage__count"))
+        expected = CreatePersonalAccessTokenSerializer(tokens.order_by("id"), many=True).data
+
+        response = self.client.get(reverse("personalaccesstoken-list"))
+        self.assertEqual(expected, sorted(response.json(), key=lambda item: item["id"]))
+
+        response = self.client.get(reverse("personalaccesstoken-detail", kwargs={"pk": token.pk}))
+        self.assertEqual(expected[0], response.json())
+
+    def test_list_answers_unchanged_tokens_with_not_modified(self):
+        token, _ = PersonalAccessToken.objects.create_token(self.user, "Token")
+        url = reverse("personalaccesstoken-list")
+        response = self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(1, len([query for query in queries if "django_pat_personalaccesstoken" in query["sql"]]))
+        self.assertFalse(any(PersonalAccessTokenUsage._meta.db_table in query["sql"] for query in queries))
+
+    def test_retrieve_answers_an_unchanged_token_with_not_modified(self):
+        token, _ = PersonalAccessToken.objects.create_token(self.user, "Token")
+        url = reverse("personalaccesstoken-detail", kwargs={"pk": token.pk})
+        etag = self.client.get(url)["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(1, len([query for query in queries if "django_pat_personalaccesstoken" in query["sql"]]))
+
+        token.revoke()
+        self.assertEqual(200, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
+
+    def test_retrieve_does_not_answer_unknown_tokens_with_not_modified(self):
+        PersonalAccessToken.objects.create_token(self.user, "Token")
+        etag = self.client.get(reverse("personalaccesstoken-list"))["ETag"]
+        other_user = User.objects.create_user("otheruser", "test@test.com", "random-insecure-text")
+        other_token, _ = PersonalAccessToken.objects.create_token(other_user, "Other Token")
+
+        for pk in (99999, other_token.pk):
+            url = reverse("personalaccesstoken-detail", kwargs={"pk": pk})
+            self.assertEqual(404, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
+            self.assertEqual(404, self.client.get(url, HTTP_IF_NONE_MATCH="*").status_code)
+
+    def test_list_etag_changes_when_tokens_are_used(self):
+        token, _ = PersonalAccessToken.objects.create_token(self.user, "Token")
+        url = reverse("personalaccesstoken-list")
+        etag = self.client.get(url)["ETag"]
+
+        PersonalAccessTokenUsage.objects.create(token=token, date=timezone.now().date(), count=1)
+        token.mark_used()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([1], [item["total_requests"] for item in response.json()])
+
+    @override_settings(PAT_SCOPES={"read": 0, "write": 1})
+    def test_creates_tokens_with_scopes(self):
+        url = reverse("personalaccesstoken-list")
+        response = self.client.post(url, data={"name": "Scoped", "scopes": ["read"]}, format="json")
+
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(["read"], response.json()["scopes"])
+
+        response = self.client.post(url, data=[{"name": "Bulk", "scopes": ["write"]}, {"name": "Full"}], format="json")
+        self.assertEqual([["write"], None], [item["scopes"] for item in response.json()])
+
+        scopes = {item["name"]: item["scopes"] for item in self.client.get(url).json()}
+        self.assertEqual({"Scoped": ["read"], "Bulk": ["write"], "Full": None}, scopes)
+
+    @override_settings(PAT_SCOPES={"read": 0})
+    def test_post_rejects_unknown_scopes(self):
+        url = reverse("personalaccesstoken-list")
+
+        self.assertEqual(400, self.client.post(url, data={"name": "Token", "scopes": ["write"]}, format="json").status_code)
+        self.assertEqual(400, self.client.post(url, data={"name": "Token", "scopes": "read"}, format="json").status_code)
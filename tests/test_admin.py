@@ -1,12 +1,16 @@
+from datetime import date
+
 from django.contrib.admin import AdminSite
 from django.contrib.auth import get_user_model
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.test import RequestFactory
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from django_pat.admin import PersonalAccessTokenAdmin
 from django_pat.admin import PersonalAccessTokenForm
 from django_pat.models import PersonalAccessToken
+from django_pat.models import PersonalAccessTokenUsage
 
 User = get_user_model()
 
@@ -31,6 +35,16 @@ class PersonalAccessTokenFormTest(TestCase):
         self.assertIsNotNone(token.plain_text_value)
         self.assertEqual(token.user, self.user)
 
+    @override_settings(PAT_SCOPES={"read": 0, "write": 1})
+    def test_it_creates_a_token_with_scopes(self):
+        form = PersonalAccessTokenForm(data={"name": "Test Key", "description": "", "scope_names": ["write"]})
+        form.current_user = self.user
+
+        self.assertTrue(form.is_valid())
+        token = form.save()
+
+        self.assertEqual(["write"], token.scope_names)
+
 
 class PersonalAccessTokenAdminTest(TestCase):
     def setUp(self):
@@ -77,3 +91,39 @@ class PersonalAccessTokenAdminTest(TestCase):
         obj, plain = PersonalAccessToken.objects.create_token(self.user, "Test", None, False)
         obj.revoke(False)
         self.assertFalse(ma.has_delete_permission(self.request, obj))
+
+    def test_it_revokes_selected_tokens_in_bulk(self):
+        request = self.request_factory.post("path")
+        request.user = self.user
+        setattr(request, "session", "session")
+        messages = FallbackStorage(request)
+        setattr(request, "_messages", messages)
+
+        ma = PersonalAccessTokenAdmin(PersonalAccessToken, self.site)
+        PersonalAccessToken.objects.create_token(self.user, "First", None)
+        PersonalAccessToken.objects.create_token(self.user, "Second", None)
+
+        ma.revoke_selected(request, PersonalAccessToken.objects.all())
+
+        self.assertFalse(PersonalAccessToken.objects.valid().exists())
+        self.assertEqual("Revoked 2 personal access tokens.", str(list(messages).pop()))
+
+    def test_it_revokes_instead_of_deleting_querysets(self):
+        ma = PersonalAccessTokenAdmin(PersonalAccessToken, self.site)
+        PersonalAccessToken.objects.create_token(self.user, "Test", None)
+
+        ma.delete_queryset(self.request, PersonalAccessToken.objects.all())
+
+        self.assertEqual(1, PersonalAccessToken.objects.count())
+        self.assertFalse(PersonalAccessToken.objects.valid().exists())
+
+    def test_it_shows_the_total_requests_of_tokens(self):
+        ma = PersonalAccessTokenAdmin(PersonalAccessToken, self.site)
+        used, _ = PersonalAccessToken.objects.create_token(self.user, "Used", None)
+        PersonalAccessToken.objects.create_token(self.user, "Unused", None)
+        PersonalAccessTokenUsage.objects.create(token=used, date=date(2024, 1, 1), count=3)
+        PersonalAccessTokenUsage.objects.create(token=used, date=date(2024, 1, 2), count=4)
+
+        totals = {token.name: ma.total_requests(token) for token in ma.get_queryset(self.request)}
+
+        self.assertEqual({"Used": 7, "Unused": 0}, totals)
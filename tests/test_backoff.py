@@ -0,0 +1,101 @@
+from unittest import mock
+from unittest import skipIf
+
+import django
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test import TestCase
+from django.test.utils import override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+
+from django_pat import cache as token_cache
+from django_pat.middleware import PatAuthenticationMiddleware
+from django_pat.models import PersonalAccessToken
+from django_pat.rest_framework.auth import PatAuthentication
+
+User = get_user_model()
+
+
+def client_header(request):
+    return request.META.get("HTTP_X_CLIENT")
+
+
+@override_settings(PAT_FAILED_AUTH_BACKOFF_ENABLED=True, PAT_FAILED_AUTH_LIMIT=2)
+class TestFailedAuthBackoff(TestCase):
+    def setUp(self):
+        token_cache.get_cache().clear()
+        self.request_factory = RequestFactory()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, self.token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+    def request(self, token_val, **extra):
+        return self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {token_val}", **extra)
+
+    def middleware_response(self, token_val, **extra):
+        def handle(request):
+            return HttpResponse(str(request.user.is_authenticated))
+
+        return PatAuthenticationMiddleware(handle)(self.request(token_val, **extra))
+
+    def test_middleware_turns_away_clients_after_repeated_failures(self):
+        self.assertEqual(b"False", self.middleware_response("pat_abcdefghijkl_guess").content)
+        self.assertEqual(b"False", self.middleware_response(self.token_val[:-1]).content)
+
+        with mock.patch.object(PersonalAccessToken.objects, "get_for_authentication") as get_for_authentication:
+            response = self.middleware_response(self.token_val)
+
+        get_for_authentication.assert_not_called()
+        self.assertEqual(429, response.status_code)
+        self.assertEqual("300", response["Retry-After"])
+
+    def test_middleware_only_counts_failures_of_the_same_client(self):
+        self.middleware_response("guess", REMOTE_ADDR="10.0.0.1")
+        self.middleware_response("guess", REMOTE_ADDR="10.0.0.1")
+
+        self.assertEqual(b"True", self.middleware_response(self.token_val, REMOTE_ADDR="10.0.0.2").content)
+
+    def test_middleware_does_not_count_successes(self):
+        for _ in range(3):
+            self.assertEqual(b"True", self.middleware_response(self.token_val).content)
+
+    @override_settings(PAT_FAILED_AUTH_BACKOFF_ENABLED=False)
+    def test_it_is_disabled_by_default(self):
+        for _ in range(3):
+            self.middleware_response("guess")
+
+        self.assertEqual(b"True", self.middleware_response(self.token_val).content)
+
+    @override_settings(PAT_FAILED_AUTH_KEY_FUNCTION="tests.test_backoff.client_header")
+    def test_it_uses_the_configured_key_function(self):
+        self.middleware_response("guess", HTTP_X_CLIENT="first")
+        self.middleware_response("guess", HTTP_X_CLIENT="first")
+
+        self.assertEqual(429, self.middleware_response(self.token_val, HTTP_X_CLIENT="first").status_code)
+        self.assertEqual(200, self.middleware_response(self.token_val, HTTP_X_CLIENT="second").status_code)
+
+    @skipIf(django.VERSION < (4, 1), "The async ORM needs Django 4.1")
+    async def test_async_middleware_turns_away_clients_after_repeated_failures(self):
+        async def handle(request):
+            user = await request.auser()
+            return HttpResponse(str(user.is_authenticated))
+
+        middleware = PatAuthenticationMiddleware(handle)
+        await middleware(self.request("guess"))
+        await middleware(self.request("guess"))
+
+        self.assertEqual(429, (await middleware(self.request(self.token_val))).status_code)
+
+    def test_rest_framework_turns_away_clients_after_repeated_failures(self):
+        authentication = PatAuthentication()
+
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                authentication.authenticate(Request(self.request("guess")))
+
+        with self.assertNumQueries(0), self.assertRaises(Throttled) as raised:
+            authentication.authenticate(Request(self.request(self.token_val)))
+
+        self.assertEqual(300, raised.exception.wait)
@@ -0,0 +1,181 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from django_pat import cache as token_cache
+from django_pat.middleware import PatAuthenticationMiddleware
+from django_pat.models import PersonalAccessToken
+from django_pat.models import _hash_value
+
+User = get_user_model()
+
+
+@override_settings(PAT_CACHE_ENABLED=True)
+class TestTokenCache(TestCase):
+    def setUp(self):
+        token_cache.get_cache().clear()
+        self.request_factory = RequestFactory()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, self.token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+    def test_it_caches_a_compact_record_on_lookup(self):
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        record = token_cache.get_token(_hash_value(self.token_val))
+        self.assertEqual(token_cache.CachedToken(self.token.pk, self.user.pk, False, True), record)
+
+    def test_it_only_loads_the_user_on_repeat_lookups(self):
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        with self.assertNumQueries(1):
+            token = PersonalAccessToken.objects.get_for_authentication(self.token_val)
+            self.assertEqual(self.token, token)
+            self.assertEqual(self.user, token.user)
+            self.assertTrue(token.user.is_active)
+
+    def test_it_does_not_cache_users_by_default(self):
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        self.assertIsNone(token_cache.get_user(self.user.pk))
+
+    @override_settings(PAT_CACHE_USERS=True)
+    def test_it_skips_the_database_on_repeat_lookups(self):
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        with self.assertNumQueries(0):
+            token = PersonalAccessToken.objects.get_for_authentication(self.token_val)
+            self.assertEqual(self.token, token)
+            self.assertEqual(self.user, token.user)
+            self.assertTrue(token.user.is_active)
+
+    def test_it_does_not_cache_unknown_tokens(self):
+        self.assertIsNone(PersonalAccessToken.objects.get_for_authentication("not-a-token"))
+        self.assertIsNone(token_cache.get_token(_hash_value("not-a-token")))
+
+    def test_it_rejects_revoked_tokens_without_a_query(self):
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+        self.token.revoke()
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(self.token_val))
+
+    def test_it_invalidates_on_token_save(self):
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+        self.token.save()
+
+        self.assertIsNone(token_cache.get_token(_hash_value(self.token_val)))
+
+    def test_it_keeps_the_record_when_marking_used(self):
+        token = PersonalAccessToken.objects.get_for_authentication(self.token_val)
+        token.mark_used()
+
+        self.assertIsNotNone(token_cache.get_token(_hash_value(self.token_val)))
+        self.token.refresh_from_db()
+        self.assertEqual("name", self.token.name)
+        self.assertIsNotNone(self.token.last_used_at)
+
+    def test_it_invalidates_on_user_save(self):
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(token_cache.get_token(_hash_value(self.token_val)))
+        token = PersonalAccessToken.objects.get_for_authentication(self.token_val)
+        self.assertFalse(token.user.is_active)
+
+    def test_middleware_uses_the_cache(self):
+        def handle(request):
+            self.assertEqual(self.user, request.user)
+
+        req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+        PatAuthenticationMiddleware(handle)(req)
+
+        self.token.revoke()
+
+        def handle_revoked(request):
+            self.assertFalse(request.user.is_authenticated)
+
+        req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+        PatAuthenticationMiddleware(handle_revoked)(req)
+
+    @override_settings(PAT_CACHE_ENABLED=False)
+    def test_it_does_not_cache_when_disabled(self):
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        self.assertIsNone(token_cache.get_token(_hash_value(self.token_val)))
+
+
+@override_settings(PAT_CACHE_ENABLED=True, PAT_LOCAL_CACHE_ENABLED=True, PAT_REVOCATION_POLL_INTERVAL=0)
+class TestLocalTokenCache(TestCase):
+    def setUp(self):
+        token_cache.get_cache().clear()
+        token_cache.local_cache.clear()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, self.token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+        self.hashed_value = _hash_value(self.token_val)
+
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+        # Drop the shared entries, leaving only what this process cached locally.
+        token_cache.get_cache().delete_many([token_cache._token_key(self.hashed_value), token_cache._user_key(self.user.pk)])
+
+    def tearDown(self):
+        token_cache.local_cache.clear()
+
+    def publish_from_another_process(self, hashed_values=(), user_ids=()):
+        generation = token_cache.bump_generation(token_cache.REVOCATION)
+        token_cache.get_cache().set(token_cache._revocation_key(generation), (list(hashed_values), list(user_ids)))
+
+    def test_it_serves_lookups_from_the_local_cache(self):
+        with self.assertNumQueries(0):
+            token = PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        self.assertEqual(self.token, token)
+        self.assertEqual(self.user, token.user)
+
+    def test_it_returns_a_copy_of_the_user(self):
+        first = PersonalAccessToken.objects.get_for_authentication(self.token_val)
+        first.user.first_name = "Changed"
+
+        second = PersonalAccessToken.objects.get_for_authentication(self.token_val)
+        self.assertEqual("", second.user.first_name)
+
+    def test_it_evicts_tokens_revoked_in_another_process(self):
+        PersonalAccessToken.objects.filter(pk=self.token.pk).update(revoked_at=timezone.now())
+        self.publish_from_another_process(hashed_values=[self.hashed_value])
+
+        self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(self.token_val))
+
+    def test_it_evicts_users_changed_in_another_process(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.publish_from_another_process(user_ids=[self.user.pk])
+
+        token = PersonalAccessToken.objects.get_for_authentication(self.token_val)
+        self.assertFalse(token.user.is_active)
+
+    def test_it_keeps_entries_not_named_in_the_log(self):
+        self.publish_from_another_process(hashed_values=["other"], user_ids=[self.user.pk + 1])
+
+        with self.assertNumQueries(0):
+            PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+    def test_it_clears_everything_when_the_log_is_incomplete(self):
+        token_cache.bump_generation(token_cache.REVOCATION)
+
+        with self.assertNumQueries(1):
+            PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+    @override_settings(PAT_REVOCATION_POLL_INTERVAL=3600)
+    def test_it_polls_the_log_at_most_once_per_interval(self):
+        token_cache.local_cache.poll()
+        self.publish_from_another_process(hashed_values=[self.hashed_value])
+
+        with self.assertNumQueries(0):
+            PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+    def test_it_evicts_tokens_revoked_in_process(self):
+        self.token.revoke()
+
+        self.assertIsNone(token_cache.local_cache.get(self.hashed_value))
+        self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(self.token_val))
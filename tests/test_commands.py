@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from django_pat.models import PersonalAccessToken
+
+User = get_user_model()
+
+
+class TestPurgePatTokens(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.long_ago = timezone.now() - timedelta(days=100)
+
+        self.valid, _ = PersonalAccessToken.objects.create_token(self.user, "valid")
+        self.recently_revoked, _ = PersonalAccessToken.objects.create_token(self.user, "recently revoked")
+        self.recently_revoked.revoke()
+        self.revoked = self.create_token("revoked", revoked_at=self.long_ago)
+        self.expired = self.create_token("expired", expires_at=self.long_ago)
+        self.unused = self.create_token("unused", last_used_at=self.long_ago)
+
+    def create_token(self, name, **fields):
+        token, _ = PersonalAccessToken.objects.create_token(self.user, name)
+        PersonalAccessToken.objects.filter(pk=token.pk).update(**fields)
+        return token
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command("purge_pat_tokens", *args, sleep=0, stdout=out)
+        return out.getvalue()
+
+    def remaining(self):
+        return set(PersonalAccessToken.objects.values_list("name", flat=True))
+
+    def test_it_purges_tokens_revoked_before_the_cutoff(self):
+        self.assertIn("Purged 1 tokens", self.purge())
+        self.assertEqual({"valid", "recently revoked", "expired", "unused"}, self.remaining())
+
+    def test_it_purges_expired_and_unused_tokens(self):
+        self.purge("--expired", "--unused")
+        self.assertEqual({"valid", "recently revoked", "revoked"}, self.remaining())
+
+    def test_it_purges_in_batches(self):
+        self.assertIn("Purged 3 tokens", self.purge("--revoked", "--expired", "--unused", "--batch-size", "1"))
+        self.assertEqual({"valid", "recently revoked"}, self.remaining())
+
+    def test_it_uses_the_cutoff(self):
+        self.purge("--days", "0")
+        self.assertEqual({"valid", "expired", "unused"}, self.remaining())
+
+    def test_it_does_not_delete_on_a_dry_run(self):
+        self.assertIn("1 tokens would be purged", self.purge("--dry-run"))
+        self.assertEqual(5, PersonalAccessToken.objects.count())
+
+    def test_it_archives_purged_tokens(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        self.purge("--archive", path)
+
+        with open(path) as archive:
+            rows = [json.loads(line) for line in archive]
+
+        self.assertEqual([self.revoked.pk], [row["id"] for row in rows])
+        self.assertEqual("revoked", rows[0]["name"])
+        self.assertNotIn("hashed_value", rows[0])
+
+    def test_it_rejects_an_invalid_batch_size(self):
+        with self.assertRaises(CommandError):
+            self.purge("--batch-size", "0")
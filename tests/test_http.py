@@ -2,7 +2,9 @@ from django.test import RequestFactory
 from django.test import SimpleTestCase
 from django.test.utils import override_settings
 
+from django_pat.http import HeaderParser
 from django_pat.http import ParseException
+from django_pat.http import get_parser
 from django_pat.http import parse_header
 
 
@@ -44,3 +46,37 @@ class TestHeaderParsing(SimpleTestCase):
         req = self.request_factory.get("path", HTTP_AUTHORIZATION="Custom-Key 1234")
         parsed_value = parse_header(req)
         self.assertEqual("1234", parsed_value)
+
+    def test_it_returns_values_containing_the_prefix(self):
+        req = self.request_factory.get("path", HTTP_AUTHORIZATION="Access-Token 1234Access-Token 5678")
+        self.assertEqual("1234Access-Token 5678", parse_header(req))
+
+    @override_settings(PAT_CUSTOM_HEADER="Content-Type")
+    def test_it_supports_unprefixed_headers(self):
+        req = self.request_factory.get("path", CONTENT_TYPE="Access-Token 1234")
+        self.assertEqual("1234", parse_header(req))
+
+
+class TestHeaderParser(SimpleTestCase):
+    def test_it_is_built_once(self):
+        self.assertIs(get_parser(), get_parser())
+
+    def test_it_is_rebuilt_when_settings_change(self):
+        parser = get_parser()
+
+        with override_settings(PAT_CUSTOM_HEADER_PREFIX=" Custom-Key "):
+            self.assertIsNot(parser, get_parser())
+            self.assertEqual("Custom-Key", get_parser().keyword)
+            self.assertEqual("Custom-Key ", get_parser().prefix)
+
+        self.assertEqual("Access-Token", get_parser().keyword)
+
+    def test_it_is_not_rebuilt_for_unrelated_settings(self):
+        parser = get_parser()
+
+        with override_settings(PAT_CACHE_ENABLED=True):
+            self.assertIs(parser, get_parser())
+
+    def test_it_reads_the_header_from_meta(self):
+        parser = HeaderParser("X-Custom-Header", "Key", False)
+        self.assertEqual("HTTP_X_CUSTOM_HEADER", parser.meta_key)
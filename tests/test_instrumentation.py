@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from django.test import SimpleTestCase
+from django.test import TestCase
+from django.test.utils import override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+
+from django_pat import cache as token_cache
+from django_pat import instrumentation
+from django_pat.instrumentation import Counters
+from django_pat.middleware import PatAuthenticationMiddleware
+from django_pat.models import PersonalAccessToken
+from django_pat.rest_framework.auth import PatAuthentication
+
+User = get_user_model()
+
+
+class TestCounters(SimpleTestCase):
+    def test_it_exports_the_prometheus_text_format(self):
+        counters = Counters()
+        counters.count(instrumentation.HIT)
+        counters.count(instrumentation.HIT)
+        counters.count(instrumentation.MISS)
+        counters.timing(instrumentation.HASH, 0.25)
+        counters.timing(instrumentation.HASH, 0.5)
+
+        self.assertEqual(
+            "# HELP django_pat_auth_events_total Personal access token lookups by outcome.\n"
+            "# TYPE django_pat_auth_events_total counter\n"
+            'django_pat_auth_events_total{event="hit"} 2\n'
+            'django_pat_auth_events_total{event="miss"} 1\n'
+            "# HELP django_pat_auth_stage_seconds Time spent in each stage of personal access token authentication.\n"
+            "# TYPE django_pat_auth_stage_seconds summary\n"
+            'django_pat_auth_stage_seconds_count{stage="hash"} 2\n'
+            'django_pat_auth_stage_seconds_sum{stage="hash"} 0.75\n',
+            counters.to_prometheus(),
+        )
+
+    def test_it_does_not_trace_without_instruments(self):
+        with instrumentation.tracing() as trace:
+            self.assertIs(instrumentation.NULL_TRACE, trace)
+            self.assertIs(instrumentation.NULL_TRACE, instrumentation.current())
+
+    def test_it_traces_when_forced(self):
+        with instrumentation.tracing(force=True) as trace:
+            self.assertIs(trace, instrumentation.current())
+            with instrumentation.tracing() as nested:
+                self.assertIs(trace, nested)
+
+        self.assertIs(instrumentation.NULL_TRACE, instrumentation.current())
+
+    @override_settings(PAT_INSTRUMENTS=["django_pat.instrumentation.counters"])
+    def test_it_loads_instruments_from_settings(self):
+        self.assertEqual((instrumentation.counters,), instrumentation.get_instruments())
+
+
+class TestInstrumentedAuthentication(TestCase):
+    def setUp(self):
+        token_cache.get_cache().clear()
+        self.counters = Counters()
+        instrumentation.register(self.counters)
+        self.addCleanup(instrumentation.unregister, self.counters)
+
+        self.request_factory = RequestFactory()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, self.token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+    def authenticate_through_middleware(self, token_val):
+        request = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {token_val}")
+        PatAuthenticationMiddleware(lambda request: request.user.is_authenticated)(request)
+
+    def test_it_times_each_stage_and_counts_hits(self):
+        self.authenticate_through_middleware(self.token_val)
+
+        self.assertEqual({"hit": 1}, dict(self.counters.events))
+        self.assertEqual(
+            {
+                instrumentation.PARSE,
+                instrumentation.LOOKUP,
+                instrumentation.HASH,
+                instrumentation.USER_CHECK,
+                instrumentation.MARK_USED,
+            },
+            set(self.counters.stage_counts),
+        )
+
+    def test_it_counts_misses_and_invalid_tokens(self):
+        self.authenticate_through_middleware("pat_abcdefghijkl_secret")
+        self.authenticate_through_middleware(self.token_val[:-1])
+
+        self.assertEqual({"miss": 1, "invalid": 1}, dict(self.counters.events))
+
+    def test_it_does_not_count_lookups_that_never_happened(self):
+        request = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+        PatAuthenticationMiddleware(lambda request: None)(request)
+
+        self.assertEqual({}, dict(self.counters.events))
+        self.assertEqual({instrumentation.PARSE}, set(self.counters.stage_counts))
+
+    @override_settings(PAT_CACHE_ENABLED=True)
+    def test_it_counts_cache_hits_and_revoked_tokens(self):
+        self.authenticate_through_middleware(self.token_val)
+        self.authenticate_through_middleware(self.token_val)
+        self.token.revoke()
+        self.authenticate_through_middleware(self.token_val)
+
+        self.assertEqual({"hit": 2, "cache_hit": 1, "revoked": 1}, dict(self.counters.events))
+        self.assertEqual(3, self.counters.stage_counts[instrumentation.CACHE])
+
+    def test_rest_framework_authentication_is_instrumented(self):
+        authentication = PatAuthentication()
+
+        request = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+        authentication.authenticate(Request(request))
+
+        request = self.request_factory.get("path", HTTP_AUTHORIZATION="Access-Token ")
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate(Request(request))
+
+        self.assertEqual({"hit": 1, "miss": 1}, dict(self.counters.events))
+        self.assertEqual(1, self.counters.stage_counts[instrumentation.MARK_USED])
@@ -1,13 +1,19 @@
 from datetime import timedelta
+from unittest import skipIf
 
+import django
+from asgiref.sync import iscoroutinefunction
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse
 from django.test import RequestFactory
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.utils import timezone
 
+from django_pat import cache as token_cache
 from django_pat.middleware import PatAuthenticationMiddleware
 from django_pat.models import PersonalAccessToken
+from django_pat.models import _hash_value
 
 User = get_user_model()
 
@@ -85,6 +91,23 @@ class TestPatAuthenticationMiddleware(TestCase):
         req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {token_val}")
         m(req)
 
+    def test_it_resolves_the_token_and_user_in_one_query(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        token, token_val = PersonalAccessToken.objects.create_token(user, "name")
+
+        def handle(request):
+            self.assertEqual("testuser", request.user.username)
+
+        m = PatAuthenticationMiddleware(handle)
+
+        # One query to resolve the token and its user, and one to record the token as used.
+        with self.assertNumQueries(2):
+            m(self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {token_val}"))
+
+        # Within the last used granularity the token is not written again.
+        with self.assertNumQueries(1):
+            m(self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {token_val}"))
+
     def test_it_does_not_use_revoked_tokens(self):
         user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
         token, token_val = PersonalAccessToken.objects.create_token(user, "name")
@@ -119,3 +142,138 @@ class TestPatAuthenticationMiddleware(TestCase):
         m = PatAuthenticationMiddleware(handle_inactive)
         req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {token_val}")
         m(req)
+
+
+@override_settings(PAT_SERVER_TIMING_ENABLED=True)
+class TestServerTiming(TestCase):
+    def setUp(self):
+        self.request_factory = RequestFactory()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, self.token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+    def get_response(self, handle, **headers):
+        request = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}", **headers)
+        return PatAuthenticationMiddleware(handle)(request)
+
+    def metric_names(self, response):
+        return [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+
+    def test_it_reports_the_stages_of_authentication(self):
+        def handle(request):
+            request.user.is_authenticated
+            return HttpResponse()
+
+        response = self.get_response(handle)
+
+        self.assertEqual(
+            ["pat-parse", "pat-lookup", "pat-hash", "pat-user-check", "pat-mark-used"], self.metric_names(response)
+        )
+
+    def test_it_only_reports_work_that_happened(self):
+        response = self.get_response(lambda request: HttpResponse())
+
+        self.assertEqual(["pat-parse"], self.metric_names(response))
+
+    def test_it_keeps_existing_metrics(self):
+        def handle(request):
+            response = HttpResponse()
+            response["Server-Timing"] = "db;dur=53"
+            return response
+
+        response = self.get_response(handle)
+
+        self.assertEqual(["db", "pat-parse"], self.metric_names(response))
+
+    @override_settings(PAT_SERVER_TIMING_SAMPLE_RATE=0)
+    def test_it_samples_requests(self):
+        response = self.get_response(lambda request: HttpResponse())
+
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(PAT_SERVER_TIMING_ENABLED=False)
+    def test_it_is_disabled_by_default(self):
+        response = self.get_response(lambda request: HttpResponse())
+
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @skipIf(django.VERSION < (4, 1), "The async ORM needs Django 4.1")
+    async def test_it_reports_stages_of_async_requests(self):
+        async def handle(request):
+            await request.auser()
+            return HttpResponse()
+
+        response = await self.get_response(handle)
+
+        self.assertIn("pat-mark-used", self.metric_names(response))
+
+
+@skipIf(django.VERSION < (4, 1), "The async ORM needs Django 4.1")
+class TestAsyncPatAuthenticationMiddleware(TestCase):
+    def setUp(self):
+        self.request_factory = RequestFactory()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, self.token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+    def test_it_is_async_when_the_response_is_async(self):
+        async def handle(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(PatAuthenticationMiddleware(handle)))
+        self.assertFalse(iscoroutinefunction(PatAuthenticationMiddleware(lambda request: HttpResponse())))
+
+    async def test_it_authenticates_with_auser(self):
+        async def handle(request):
+            user = await request.auser()
+            self.assertTrue(user.is_authenticated)
+            self.assertEqual(self.user, user)
+            self.assertIs(user, await request.auser())
+            return HttpResponse()
+
+        m = PatAuthenticationMiddleware(handle)
+        req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+        await m(req)
+
+        token = await PersonalAccessToken.objects.aget(pk=self.token.pk)
+        self.assertIsNotNone(token.last_used_at)
+
+    async def test_it_does_not_use_revoked_tokens(self):
+        await PersonalAccessToken.objects.filter(pk=self.token.pk).aupdate(revoked_at=timezone.now())
+
+        async def handle(request):
+            user = await request.auser()
+            self.assertFalse(user.is_authenticated)
+            return HttpResponse()
+
+        m = PatAuthenticationMiddleware(handle)
+        req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+        await m(req)
+
+    async def test_it_checks_user_active_status(self):
+        await User.objects.filter(pk=self.user.pk).aupdate(is_active=False)
+
+        async def handle(request):
+            user = await request.auser()
+            self.assertFalse(user.is_authenticated)
+            return HttpResponse()
+
+        m = PatAuthenticationMiddleware(handle)
+        req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+        await m(req)
+
+    @override_settings(PAT_CACHE_ENABLED=True)
+    async def test_it_uses_the_cache(self):
+        await token_cache.get_cache().aclear()
+
+        async def handle(request):
+            user = await request.auser()
+            self.assertEqual(self.user, user)
+            return HttpResponse()
+
+        m = PatAuthenticationMiddleware(handle)
+        req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+        await m(req)
+
+        self.assertIsNotNone(await token_cache.aget_token(_hash_value(self.token_val)))
+
+        req = self.request_factory.get("path", HTTP_AUTHORIZATION=f"Access-Token {self.token_val}")
+        await m(req)
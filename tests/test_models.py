@@ -1,11 +1,24 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+
 import pytest
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.db import connection
+from django.db import transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.test.utils import override_settings
+from django.utils import timezone
 
+from django_pat import cache as token_cache
+from django_pat import write_behind
 from django_pat.models import PersonalAccessToken
 from django_pat.models import PersonalAccessTokenManager
+from django_pat.models import TokenEntry
+from django_pat.models import _hash_value
 
 User = get_user_model()
 
@@ -41,3 +54,306 @@ class TestPersonalAccessTokenManager(TestCase):
 
         self.assertEqual(PersonalAccessToken.objects.with_value(token_val1).first(), token1)
         self.assertEqual(PersonalAccessToken.objects.with_value(token_val2).first(), token2)
+
+    def test_it_creates_prefixed_tokens(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        token, token_val = PersonalAccessToken.objects.create_token(user, "name")
+
+        prefix, lookup_id, secret = token_val.split("_", 2)
+        self.assertEqual("pat", prefix)
+        self.assertEqual(token.lookup_id, lookup_id)
+        self.assertNotIn(secret, token.hashed_value)
+
+    @override_settings(PAT_TOKEN_FORMAT="uuid")
+    def test_it_creates_legacy_uuid_tokens(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        token, token_val = PersonalAccessToken.objects.create_token(user, "name")
+
+        self.assertIsInstance(token_val, uuid.UUID)
+        self.assertIsNone(token.lookup_id)
+        self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(str(token_val)))
+
+    @override_settings(PAT_TOKEN_FORMAT="other")
+    def test_it_fails_to_create_tokens_with_an_unknown_format(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        with pytest.raises(ValueError):
+            PersonalAccessToken.objects.create_token(user, "name")
+
+    def test_it_authenticates_prefixed_tokens_by_lookup_id(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        token, token_val = PersonalAccessToken.objects.create_token(user, "name")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+
+        self.assertIn("lookup_id", queries[0]["sql"])
+        self.assertNotIn('hashed_value" =', queries[0]["sql"])
+
+    def test_it_rejects_prefixed_tokens_with_the_wrong_secret(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        token, token_val = PersonalAccessToken.objects.create_token(user, "name")
+
+        self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(token_val[:-1] + "x"))
+
+    def test_it_authenticates_legacy_uuid_tokens(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        with override_settings(PAT_TOKEN_FORMAT="uuid"):
+            token, token_val = PersonalAccessToken.objects.create_token(user, "name")
+
+        self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+
+    def test_it_creates_tokens_in_bulk(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        entries = [TokenEntry(user, f"token {i}") for i in range(5)]
+
+        with self.assertNumQueries(3):
+            created = list(PersonalAccessToken.objects.bulk_create_tokens(entries, batch_size=2))
+
+        self.assertEqual(5, len(created))
+        for token, token_val in created:
+            self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+
+    def test_it_reads_back_ids_of_tokens_created_in_bulk(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        entries = [TokenEntry(user, f"token {i}") for i in range(3)]
+
+        features = mock.patch.object(
+            type(connection.features), "can_return_rows_from_bulk_insert", new_callable=mock.PropertyMock, return_value=False
+        )
+        with features:
+            with override_settings(PAT_TOKEN_FORMAT="uuid"):
+                created = list(PersonalAccessToken.objects.bulk_create_tokens(entries[:1]))
+            created += PersonalAccessToken.objects.bulk_create_tokens(entries[1:])
+
+        for token, token_val in created:
+            self.assertIsNotNone(token.pk)
+            self.assertEqual(token.pk, PersonalAccessToken.objects.get_for_authentication(token_val).pk)
+
+    def test_it_creates_tokens_in_bulk_lazily(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        created = PersonalAccessToken.objects.bulk_create_tokens(
+            [TokenEntry(user, "first"), TokenEntry(user, "second")], batch_size=1
+        )
+
+        self.assertEqual(0, PersonalAccessToken.objects.count())
+        token, _ = next(created)
+        self.assertEqual(["first"], list(PersonalAccessToken.objects.values_list("name", flat=True)))
+
+    @override_settings(PAT_SCOPES={"read": 0, "write": 1})
+    def test_it_stores_scopes_as_a_mask(self):
+        user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        token, token_val = PersonalAccessToken.objects.create_token(user, "scoped", scopes=["write"])
+        (bulk_token, _), (full_token, _) = PersonalAccessToken.objects.bulk_create_tokens(
+            [TokenEntry(user, "bulk", scopes=["read", "write"]), TokenEntry(user, "full")]
+        )
+
+        self.assertEqual(
+            {"scoped": 0b10, "bulk": 0b11, "full": None}, dict(PersonalAccessToken.objects.values_list("name", "scopes"))
+        )
+
+        token = PersonalAccessToken.objects.get_for_authentication(token_val)
+        self.assertEqual(["write"], token.scope_names)
+        self.assertTrue(token.has_scopes(0b10))
+        self.assertFalse(token.has_scopes(0b11))
+        self.assertTrue(full_token.has_scopes(0b11))
+
+        with self.assertRaises(ValueError):
+            PersonalAccessToken.objects.create_token(user, "unknown", scopes=["delete"])
+
+
+class TestPersonalAccessToken(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, self.token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+    def test_valid_tokens_have_unique_hashed_values(self):
+        duplicate = PersonalAccessToken(user=self.user, hashed_value=self.token.hashed_value, name="duplicate")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            duplicate.save()
+
+        self.token.revoke()
+        duplicate.save()
+
+    def test_mark_used_writes_only_when_stale(self):
+        with self.assertNumQueries(1):
+            self.token.mark_used()
+
+        with self.assertNumQueries(0):
+            self.token.mark_used()
+
+        self.token.last_used_at = timezone.now() - timedelta(minutes=2)
+        with self.assertNumQueries(1):
+            self.token.mark_used()
+
+    def test_mark_used_skips_recently_used_rows(self):
+        used_at = timezone.now() - timedelta(seconds=10)
+        PersonalAccessToken.objects.filter(pk=self.token.pk).update(last_used_at=used_at)
+
+        # The instance is stale, so the database condition decides.
+        self.token.mark_used()
+
+        self.token.refresh_from_db()
+        self.assertEqual(used_at, self.token.last_used_at)
+
+    @override_settings(PAT_LAST_USED_GRANULARITY=0)
+    def test_mark_used_always_writes_without_granularity(self):
+        self.token.mark_used()
+
+        with self.assertNumQueries(1):
+            self.token.mark_used()
+
+    def test_mark_used_does_not_undo_a_revocation(self):
+        stale = PersonalAccessToken.objects.get(pk=self.token.pk)
+        self.token.revoke()
+
+        stale.mark_used()
+
+        self.token.refresh_from_db()
+        self.assertIsNotNone(self.token.revoked_at)
+        self.assertIsNotNone(self.token.last_used_at)
+
+    @override_settings(PAT_CACHE_ENABLED=True)
+    def test_mark_used_claims_the_window_through_the_cache(self):
+        token_cache.get_cache().clear()
+        other = PersonalAccessToken.objects.get(pk=self.token.pk)
+
+        with self.assertNumQueries(1):
+            self.token.mark_used()
+
+        with self.assertNumQueries(0):
+            other.last_used_at = None
+            other.mark_used()
+
+    def test_queryset_revokes_tokens_with_a_single_update(self):
+        other_token, _ = PersonalAccessToken.objects.create_token(self.user, "other")
+        self.token.revoke()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(1, PersonalAccessToken.objects.filter(user=self.user).revoke())
+
+        other_token.refresh_from_db()
+        self.assertIsNotNone(other_token.revoked_at)
+
+    def test_it_revokes_all_tokens_for_a_user(self):
+        other_user = User.objects.create_user("otheruser", "test@test.com", "random-insecure-text")
+        other_token, _ = PersonalAccessToken.objects.create_token(other_user, "name")
+        PersonalAccessToken.objects.create_token(self.user, "second")
+
+        self.assertEqual(2, PersonalAccessToken.objects.revoke_all_for_user(self.user))
+        self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(self.token_val))
+        self.assertFalse(PersonalAccessToken.objects.filter(user=self.user).valid().exists())
+        self.assertTrue(PersonalAccessToken.objects.filter(pk=other_token.pk).valid().exists())
+
+    @override_settings(PAT_CACHE_ENABLED=True)
+    def test_queryset_revoke_replaces_cached_lookups_with_tombstones(self):
+        token_cache.get_cache().clear()
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        PersonalAccessToken.objects.revoke_all_for_user(self.user)
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(self.token_val))
+
+    @override_settings(PAT_CACHE_ENABLED=True)
+    def test_revoking_valid_tokens_replaces_cached_lookups_with_tombstones(self):
+        token_cache.get_cache().clear()
+        PersonalAccessToken.objects.get_for_authentication(self.token_val)
+
+        self.assertEqual(1, PersonalAccessToken.objects.valid().filter(user=self.user).revoke())
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(self.token_val))
+
+    def test_tokens_do_not_expire_by_default(self):
+        self.assertIsNone(self.token.expires_at)
+
+    @override_settings(PAT_DEFAULT_LIFETIME=3600)
+    def test_tokens_expire_after_the_default_lifetime(self):
+        token, _ = PersonalAccessToken.objects.create_token(self.user, "expiring")
+        self.assertAlmostEqual(timezone.now() + timedelta(hours=1), token.expires_at, delta=timedelta(seconds=5))
+
+        expires_at = timezone.now() + timedelta(days=1)
+        token, _ = PersonalAccessToken.objects.create_token(self.user, "explicit", expires_at=expires_at)
+        self.assertEqual(expires_at, token.expires_at)
+
+        ((token, _),) = PersonalAccessToken.objects.bulk_create_tokens([TokenEntry(self.user, "bulk")])
+        self.assertIsNotNone(token.expires_at)
+
+    def test_expired_tokens_are_not_valid(self):
+        expired, expired_val = PersonalAccessToken.objects.create_token(
+            self.user, "expired", expires_at=timezone.now() + timedelta(days=1)
+        )
+        PersonalAccessToken.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual([self.token], list(PersonalAccessToken.objects.valid()))
+        with self.assertNumQueries(1):
+            self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(expired_val))
+        self.assertEqual(self.token, PersonalAccessToken.objects.get_for_authentication(self.token_val))
+
+    @override_settings(PAT_CACHE_ENABLED=True)
+    def test_cached_lookups_expire_with_the_token(self):
+        token_cache.get_cache().clear()
+        token, token_val = PersonalAccessToken.objects.create_token(
+            self.user, "expiring", expires_at=timezone.now() + timedelta(minutes=1)
+        )
+        self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+
+        with mock.patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(minutes=2)):
+            with self.assertNumQueries(0):
+                self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(token_val))
+
+
+@override_settings(PAT_LAST_USED_FLUSH_INTERVAL=3600)
+class TestSecretRotation(TestCase):
+    def setUp(self):
+        write_behind.rehash.clear()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+
+    def tearDown(self):
+        write_behind.rehash.clear()
+
+    @override_settings(PAT_SECRETS={"2024": "new_secret"})
+    def test_it_hashes_new_tokens_with_the_current_key(self):
+        token, token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+        self.assertEqual("2024", token.key_id)
+        self.assertEqual(_hash_value(token_val, "2024"), token.hashed_value)
+
+    @override_settings(PAT_SECRETS={"2024": "new_secret"})
+    def test_it_hashes_prefixed_tokens_once(self):
+        token, token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+        with mock.patch("django_pat.models._hash_value", wraps=_hash_value) as hash_value:
+            self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+
+        hash_value.assert_called_once_with(token_val, "2024")
+
+    def test_it_authenticates_and_rehashes_tokens_hashed_with_an_old_key(self):
+        token, token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+        with override_settings(PAT_SECRETS={"2024": "new_secret"}):
+            self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+            self.assertIn(token.pk, write_behind.rehash.pending())
+
+            write_behind.rehash.flush()
+
+            token.refresh_from_db()
+            self.assertEqual("2024", token.key_id)
+            self.assertEqual(_hash_value(token_val, "2024"), token.hashed_value)
+            self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+
+    def test_it_authenticates_legacy_uuid_tokens_hashed_with_an_old_key(self):
+        with override_settings(PAT_TOKEN_FORMAT="uuid"):
+            token, token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+        with override_settings(PAT_SECRETS={"2024": "new_secret"}):
+            self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+            self.assertIn(token.pk, write_behind.rehash.pending())
+
+    @override_settings(PAT_SECRETS={"2023": "old_secret"})
+    def test_it_rejects_tokens_hashed_with_a_removed_key(self):
+        token, token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+
+        with override_settings(PAT_SECRETS={"2024": "new_secret"}):
+            self.assertIsNone(PersonalAccessToken.objects.get_for_authentication(token_val))
@@ -0,0 +1,139 @@
+from unittest import mock
+from unittest import skipIf
+
+import django
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from django_pat import cache as token_cache
+from django_pat import prefilter
+from django_pat.models import PersonalAccessToken
+from django_pat.prefilter import BloomFilter
+from django_pat.prefilter import token_prefilter
+
+User = get_user_model()
+
+
+class TestBloomFilter(SimpleTestCase):
+    def test_it_contains_added_items(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f"item-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_it_rejects_most_unknown_items(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"item-{i}")
+
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+@override_settings(PAT_PREFILTER_ENABLED=True)
+class TestTokenPrefilter(TestCase):
+    def setUp(self):
+        token_cache.get_cache().clear()
+        token_prefilter.clear()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, self.token_val = PersonalAccessToken.objects.create_token(self.user, "name")
+        with override_settings(PAT_TOKEN_FORMAT="uuid"):
+            self.legacy_token, self.legacy_token_val = PersonalAccessToken.objects.create_token(self.user, "legacy")
+
+        schedule = mock.patch.object(token_prefilter, "_schedule_rebuild")
+        self.schedule_rebuild = schedule.start()
+        self.addCleanup(schedule.stop)
+
+        token_prefilter.rebuild()
+
+    def tearDown(self):
+        token_prefilter.clear()
+
+    def test_it_rejects_unknown_tokens_without_a_query(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(PersonalAccessToken.objects.get_for_authentication("pat_abcdefghijkl_secret"))
+            self.assertIsNone(PersonalAccessToken.objects.get_for_authentication("not-a-token"))
+
+    def test_it_allows_known_tokens(self):
+        self.assertEqual(self.token, PersonalAccessToken.objects.get_for_authentication(self.token_val))
+        self.assertEqual(self.legacy_token, PersonalAccessToken.objects.get_for_authentication(self.legacy_token_val))
+
+    def test_it_adds_tokens_created_in_process(self):
+        token, token_val = PersonalAccessToken.objects.create_token(self.user, "new")
+
+        self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+        self.schedule_rebuild.assert_not_called()
+
+    def test_it_announces_tokens_once_committed(self):
+        generation = token_cache.get_generation(prefilter.GENERATION)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            token, token_val = PersonalAccessToken.objects.create_token(self.user, "new")
+            self.assertEqual(generation, token_cache.get_generation(prefilter.GENERATION))
+
+        self.assertEqual(generation + 1, token_cache.get_generation(prefilter.GENERATION))
+        self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+        self.schedule_rebuild.assert_not_called()
+
+    def test_it_replays_tokens_committed_after_the_filter_was_built(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            token, token_val = PersonalAccessToken.objects.create_token(self.user, "new")
+
+            # A rebuild that does not see the uncommitted token yet.
+            with mock.patch.object(BloomFilter, "add"):
+                token_prefilter.rebuild()
+
+        self.assertEqual(token, PersonalAccessToken.objects.get_for_authentication(token_val))
+        self.schedule_rebuild.assert_not_called()
+
+    def test_it_replays_tokens_announced_by_another_process(self):
+        generation = token_cache.bump_generation(prefilter.GENERATION)
+        token_cache.get_cache().set(prefilter._announcement_key(generation), ["pat_abcdefghijkl"])
+
+        self.assertTrue(token_prefilter.might_contain(["pat_abcdefghijkl"]))
+        self.assertFalse(token_prefilter.might_contain(["unknown"]))
+        self.schedule_rebuild.assert_not_called()
+
+    def test_it_allows_all_tokens_when_it_cannot_replay_announcements(self):
+        token_cache.bump_generation(prefilter.GENERATION)
+
+        self.assertTrue(token_prefilter.might_contain(["unknown"]))
+        self.schedule_rebuild.assert_called_once_with()
+
+    def test_it_allows_all_tokens_when_the_generation_was_evicted(self):
+        for name in ["first", "second"]:
+            with self.captureOnCommitCallbacks(execute=True):
+                PersonalAccessToken.objects.create_token(self.user, name)
+        token_cache.get_cache().clear()
+        token_cache.bump_generation(prefilter.GENERATION)
+
+        self.assertTrue(token_prefilter.might_contain(["unknown"]))
+        self.schedule_rebuild.assert_called_once_with()
+
+    def test_it_rejects_tokens_between_polls_without_the_cache(self):
+        self.assertFalse(token_prefilter.might_contain(["unknown"]))
+
+        with mock.patch.object(token_cache, "get_generation") as get_generation:
+            self.assertFalse(token_prefilter.might_contain(["unknown"]))
+
+        get_generation.assert_not_called()
+
+    def test_it_allows_all_tokens_until_built(self):
+        token_prefilter.clear()
+
+        self.assertTrue(token_prefilter.might_contain(["unknown"]))
+        self.schedule_rebuild.assert_called_once_with()
+
+    @override_settings(PAT_PREFILTER_REBUILD_INTERVAL=0)
+    def test_it_rebuilds_periodically(self):
+        self.assertFalse(token_prefilter.might_contain(["unknown"]))
+        self.schedule_rebuild.assert_called_once_with()
+
+    @skipIf(django.VERSION < (4, 1), "The async ORM needs Django 4.1")
+    async def test_it_rejects_unknown_tokens_asynchronously(self):
+        self.assertIsNone(await PersonalAccessToken.objects.aget_for_authentication("pat_abcdefghijkl_secret"))
+        self.assertEqual(self.token, await PersonalAccessToken.objects.aget_for_authentication(self.token_val))
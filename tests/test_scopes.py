@@ -0,0 +1,28 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from django_pat import scopes
+
+
+@override_settings(PAT_SCOPES={"read": 0, "write": 1, "admin": 62})
+class TestScopes(TestCase):
+    def test_it_maps_scope_names_to_masks(self):
+        self.assertEqual(0b11, scopes.to_mask(["read", "write"]))
+        self.assertEqual(1 << 62, scopes.get_mask(("admin",)))
+        self.assertEqual(["read", "admin"], scopes.to_names((1 << 62) | 1))
+
+    def test_it_rejects_unknown_scopes(self):
+        with self.assertRaises(ValueError):
+            scopes.to_mask(["read", "delete"])
+
+    def test_it_rejects_invalid_bits(self):
+        for registry in ({"read": 63}, {"read": -1}, {"read": 0, "write": 0}):
+            with self.subTest(registry=registry), override_settings(PAT_SCOPES=registry):
+                with self.assertRaises(ValueError):
+                    scopes.get_scopes()
+
+    def test_it_reloads_scopes_when_settings_change(self):
+        self.assertEqual(0b10, scopes.get_mask(("write",)))
+
+        with override_settings(PAT_SCOPES={"write": 3}):
+            self.assertEqual(0b1000, scopes.get_mask(("write",)))
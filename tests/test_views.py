@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from django_pat.models import PersonalAccessToken
+
+User = get_user_model()
+
+
+class TestListTokensView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.client.force_login(self.user)
+
+        now = timezone.now()
+        for i in range(45):
+            token, _ = PersonalAccessToken.objects.create_token(self.user, f"token {i}")
+            # Every third token shares its creation time with the next, so pages also have to be split by id.
+            PersonalAccessToken.objects.filter(pk=token.pk).update(created_at=now - timedelta(minutes=i - i % 3))
+
+        other_user = User.objects.create_user("otheruser", "test@test.com", "random-insecure-text")
+        PersonalAccessToken.objects.create_token(other_user, "other token")
+
+    def test_it_pages_through_tokens_newest_first(self):
+        names = []
+        url = reverse("list_tokens")
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(200, response.status_code)
+            names.extend(token.name for token in response.context["object_list"])
+
+            cursor = response.context["next_cursor"]
+            url = f"{reverse('list_tokens')}?after={cursor}" if cursor else None
+
+        expected = PersonalAccessToken.objects.filter(user=self.user).order_by("-created_at", "-id")
+        self.assertEqual([token.name for token in expected], names)
+
+    def test_it_loads_a_page_without_counting_or_loading_hashes(self):
+        response = self.client.get(reverse("list_tokens"))
+        cursor = response.context["next_cursor"]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f"{reverse('list_tokens')}?after={cursor}")
+
+        # Besides the page, only the version of the tokens is queried for the ETag.
+        token_queries = [query["sql"] for query in queries if "django_pat_personalaccesstoken" in query["sql"]]
+        self.assertEqual(2, len(token_queries))
+        self.assertNotIn("COUNT", token_queries[1])
+        self.assertNotIn("hashed_value", token_queries[1])
+
+    def test_it_rejects_invalid_cursors(self):
+        response = self.client.get(f"{reverse('list_tokens')}?after=invalid")
+
+        self.assertEqual(404, response.status_code)
+
+    def test_it_answers_unchanged_lists_with_not_modified(self):
+        response = self.client.get(reverse("list_tokens"))
+        self.assertIn("private", response["Cache-Control"])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("list_tokens"), HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(1, len([query for query in queries if "django_pat_personalaccesstoken" in query["sql"]]))
+
+    def test_it_changes_the_etag_when_tokens_change(self):
+        etag = self.client.get(reverse("list_tokens"))["ETag"]
+
+        PersonalAccessToken.objects.filter(user=self.user).first().revoke()
+        response = self.client.get(reverse("list_tokens"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response["ETag"])
+
+
+@override_settings(PAT_SCOPES={"read": 0, "write": 1})
+class TestCreateTokenView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.client.force_login(self.user)
+
+    def test_it_creates_a_token_with_the_selected_scopes(self):
+        response = self.client.post(reverse("create_token"), {"name": "Scoped", "scopes": ["read"]})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(["read"], PersonalAccessToken.objects.get(name="Scoped").scope_names)
+
+    def test_it_rejects_unknown_scopes(self):
+        response = self.client.post(reverse("create_token"), {"name": "Scoped", "scopes": ["delete"]})
+
+        self.assertIn("scopes", response.context["form"].errors)
+        self.assertFalse(PersonalAccessToken.objects.exists())
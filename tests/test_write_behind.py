@@ -0,0 +1,147 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from django_pat import write_behind
+from django_pat.models import PersonalAccessToken
+from django_pat.models import PersonalAccessTokenUsage
+
+User = get_user_model()
+
+
+@override_settings(PAT_LAST_USED_WRITE_BEHIND=True, PAT_LAST_USED_FLUSH_INTERVAL=3600)
+class TestLastUsedWriteBehind(TestCase):
+    def setUp(self):
+        write_behind.last_used.clear()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, _ = PersonalAccessToken.objects.create_token(self.user, "name")
+        self.other, _ = PersonalAccessToken.objects.create_token(self.user, "other")
+
+    def tearDown(self):
+        write_behind.last_used.clear()
+
+    def test_it_buffers_last_used_without_writing(self):
+        with self.assertNumQueries(0):
+            self.token.mark_used()
+
+        self.assertIn(self.token.pk, write_behind.last_used.pending())
+        self.token.refresh_from_db()
+        self.assertIsNone(self.token.last_used_at)
+
+    def test_it_keeps_the_latest_time_per_token(self):
+        now = timezone.now()
+        write_behind.last_used.add(self.token.pk, now)
+        write_behind.last_used.add(self.token.pk, now - timedelta(minutes=1))
+
+        self.assertEqual({self.token.pk: now}, write_behind.last_used.pending())
+
+    def test_it_flushes_all_tokens_in_one_update(self):
+        self.token.mark_used()
+        self.other.mark_used()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(2, write_behind.last_used.flush())
+
+        self.token.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertIsNotNone(self.token.last_used_at)
+        self.assertIsNotNone(self.other.last_used_at)
+        self.assertEqual({}, write_behind.last_used.pending())
+
+    def test_it_does_not_move_last_used_backwards(self):
+        now = timezone.now()
+        PersonalAccessToken.objects.filter(pk=self.token.pk).update(last_used_at=now)
+        write_behind.last_used.add(self.token.pk, now - timedelta(minutes=1))
+        write_behind.last_used.add(self.other.pk, now - timedelta(minutes=1))
+
+        self.assertEqual(2, write_behind.last_used.flush())
+
+        self.token.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(now, self.token.last_used_at)
+        self.assertEqual(now - timedelta(minutes=1), self.other.last_used_at)
+
+    def test_flush_does_nothing_when_empty(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(0, write_behind.last_used.flush())
+
+    @override_settings(PAT_LAST_USED_WRITE_BEHIND=False)
+    def test_it_writes_immediately_when_disabled(self):
+        self.token.mark_used()
+
+        self.assertEqual({}, write_behind.last_used.pending())
+        self.token.refresh_from_db()
+        self.assertIsNotNone(self.token.last_used_at)
+
+
+@override_settings(PAT_USAGE_TRACKING_ENABLED=True, PAT_LAST_USED_FLUSH_INTERVAL=3600)
+class TestUsageWriteBehind(TestCase):
+    def setUp(self):
+        write_behind.usage.clear()
+        self.user = User.objects.create_user("testuser", "test@test.com", "random-insecure-text")
+        self.token, _ = PersonalAccessToken.objects.create_token(self.user, "name")
+        self.other, _ = PersonalAccessToken.objects.create_token(self.user, "other")
+        self.today = timezone.now().date()
+
+    def tearDown(self):
+        write_behind.usage.clear()
+
+    def usage(self):
+        return set(PersonalAccessTokenUsage.objects.values_list("token_id", "date", "count"))
+
+    def test_it_counts_every_use_in_memory(self):
+        for _ in range(3):
+            self.token.mark_used()
+
+        self.assertEqual({self.token.pk: {self.today: 3}}, write_behind.usage.pending())
+        self.assertEqual(set(), self.usage())
+
+    def test_it_flushes_counts_as_daily_buckets(self):
+        yesterday = self.today - timedelta(days=1)
+        write_behind.usage.add(self.token.pk, yesterday, 2)
+        write_behind.usage.add(self.token.pk, self.today)
+        write_behind.usage.add(self.other.pk, self.today, 5)
+
+        write_behind.usage.flush()
+
+        self.assertEqual(
+            {(self.token.pk, yesterday, 2), (self.token.pk, self.today, 1), (self.other.pk, self.today, 5)},
+            self.usage(),
+        )
+
+    def test_it_adds_to_existing_buckets(self):
+        PersonalAccessTokenUsage.objects.create(token=self.token, date=self.today, count=10)
+        write_behind.usage.add(self.token.pk, self.today, 2)
+        write_behind.usage.add(self.other.pk, self.today, 1)
+
+        with self.assertNumQueries(3):
+            write_behind.usage.flush()
+
+        self.assertEqual({(self.token.pk, self.today, 12), (self.other.pk, self.today, 1)}, self.usage())
+
+    def test_it_drops_counts_for_deleted_tokens(self):
+        write_behind.usage.add(self.token.pk, self.today)
+        self.token.delete()
+
+        self.assertEqual(1, write_behind.usage.flush())
+        self.assertEqual(set(), self.usage())
+
+    def test_it_keeps_counts_when_a_flush_fails(self):
+        write_behind.usage.add(self.token.pk, self.today, 2)
+
+        with mock.patch.object(write_behind.usage, "_write", side_effect=DatabaseError):
+            self.assertEqual(0, write_behind.usage.flush())
+
+        write_behind.usage.add(self.token.pk, self.today)
+        self.assertEqual({self.token.pk: {self.today: 3}}, write_behind.usage.pending())
+
+    @override_settings(PAT_USAGE_TRACKING_ENABLED=False)
+    def test_it_does_not_count_when_disabled(self):
+        self.token.mark_used()
+
+        self.assertEqual({}, write_behind.usage.pending())
@@ -5,4 +5,5 @@ from django_pat.rest_framework.urls import router
 
 urlpatterns = [
     path("api/", include(router.urls)),
+    path("", include("django_pat.urls")),
 ]